@@ -1,16 +1,19 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from tasksA import *
-from tasksB import *
-import requests
 from dotenv import load_dotenv
+from http_client import aiproxy_post, close_client
+from classification_cache import ClassificationCache, fingerprint
+import router
+import registry
+import prettier_daemon
+from registry import function_definitions_llm
+from jobs import JobQueue, QueueFull
+from file_serving import read_cache, serve_file
+from sqlite_pool import query_cache
+from pathlib import Path
 import os
-import re
-import httpx
-import json
-
-import os
+import time
 
 # Ensure the correct directory is used
 DATA_DIR = "D:/IITM/TDS/tds_p1/data"
@@ -33,412 +36,120 @@ app.add_middleware(
 
 load_dotenv()
 
+
+@app.on_event("startup")
+async def startup():
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    await close_client()
+    registry.shutdown_pools()
+    prettier_daemon.shutdown()
+
+
 @app.get("/ask")
-def ask(prompt: str):
-    result = get_completions(prompt)
+async def ask(prompt: str):
+    result = await get_completions(prompt)
     return result
 
-openai_api_chat = "http://aiproxy.sanand.workers.dev/openai/v1/chat/completions"  # for testing
-openai_api_key = os.getenv("AIPROXY_TOKEN")
+async def get_completions(prompt: str):
+    response = await aiproxy_post(
+        "chat/completions",
+        {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "You are a function classifier that extracts structured parameters from queries."},
+                {"role": "user", "content": prompt}
+            ],
+            "tools": registry.tools,
+            "tool_choice": "auto"
+        },
+    )
+    function = response["choices"][0]["message"]["tool_calls"][0]["function"]
+    print(function)
+    return function
+
+
+classification_cache = ClassificationCache(version=fingerprint(function_definitions_llm))
+
+
+async def classify(task: str):
+    """Map task text to a tool call, trying the local router and the cache before the LLM."""
+    function = router.route(task, known={f["name"] for f in function_definitions_llm})
+    if function is not None:
+        return function
+    function = classification_cache.get(task)
+    if function is None:
+        function = await get_completions(task)
+        # Only remember tool calls the registry would accept
+        registry.prepare(function["name"], function["arguments"])
+        classification_cache.put(task, function)
+    return function
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"classification": classification_cache.info(), "router": router.stats, "read": read_cache.info(), "sql": query_cache.info()}
+
+async def execute_task(task: str):
+    start = time.perf_counter()
+    response = await classify(task)
+    print(response)
+    task_code = response['name']
+    arguments = registry.prepare(task_code, response['arguments'])
+    classified = time.perf_counter()
+    try:
+        await registry.execute(task_code, arguments)
+    finally:
+        # Any path argument may have been written; drop it from the /read cache
+        for value in arguments.values():
+            if isinstance(value, (str, Path)):
+                read_cache.invalidate(get_correct_path(str(value)))
+    timings = {"classify": classified - start, "execute": time.perf_counter() - classified}
+    return {"message": f"{task_code} Task '{task}' executed successfully", "task": task_code, "timings": timings}
 
-headers = {
-    "Authorization": f"Bearer {openai_api_key}",
-    "Content-Type": "application/json",
-}
-function_definitions_llm = [
-    {
-        "name": "A1",
-        "description": "Run a Python script from a given URL, passing an email as the argument.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                # "filename": {"type": "string", "pattern": r"https?://.*\.py"},
-                # "targetfile": {"type": "string", "pattern": r"./(.\.py)"},
-                "email": {"type": "string", "pattern": r"[\w\.-]+@[\w\.-]+\.\w+"}
-            },
-            "required": ["filename", "targetfile", "email"]
-        }
-    },
-    {
-        "name": "A2",
-        "description": "Format a markdown file using a specified version of Prettier.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prettier_version": {"type": "string", "pattern": r"prettier@\d+\.\d+\.\d+"},
-                "filename": {"type": "string", "pattern": r"./(.\.md)"}
-            },
-            "required": ["prettier_version", "filename"]
-        }
-    },
-    {
-        "name": "A3",
-        "description": "Count the number of occurrences of a specific weekday in a date file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {"type": "string", "pattern": r"/data/.dates.\.txt"},
-                "targetfile": {"type": "string", "pattern": r"/data/./(.\.txt)"},
-                "weekday": {"type": "integer", "pattern": r"(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)"}
-            },
-            "required": ["filename", "targetfile", "weekday"]
-        }
-    },
-    {
-        "name": "A4",
-        "description": "Sort a JSON contacts file and save the sorted version to a target file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.json)",
-                },
-                "targetfile": {
-                    "type": "string",
-                    "pattern": r"./(.\.json)",
-                }
-            },
-            "required": ["filename", "targetfile"]
-        }
-    },
-    {
-        "name": "A5",
-        "description": "Retrieve the most recent log files from a directory and save their content to an output file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "log_dir_path": {
-                    "type": "string",
-                    "pattern": r".*/logs",
-                    "default": "/data/logs"
-                },
-                "output_file_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/logs-recent.txt"
-                },
-                "num_files": {
-                    "type": "integer",
-                    "minimum": 1,
-                    "default": 10
-                }
-            },
-            "required": ["log_dir_path", "output_file_path", "num_files"]
-        }
-    },
-    {
-        "name": "A6",
-        "description": "Generate an index of documents from a directory and save it as a JSON file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "doc_dir_path": {
-                    "type": "string",
-                    "pattern": r".*/docs",
-                    "default": "/data/docs"
-                },
-                "output_file_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.json)",
-                    "default": "/data/docs/index.json"
-                }
-            },
-            "required": ["doc_dir_path", "output_file_path"]
-        }
-    },
-    {
-        "name": "A7",
-        "description": "Extract the sender's email address from a text file and save it to an output file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/email.txt"
-                },
-                "output_file": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/email-sender.txt"
-                }
-            },
-            "required": ["filename", "output_file"]
-        }
-    },
-    {
-        "name": "A8",
-        "description": "Generate an image representation of credit card details from a text file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/credit-card.txt"
-                },
-                "image_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.png)",
-                    "default": "/data/credit-card.png"
-                }
-            },
-            "required": ["filename", "image_path"]
-        }
-    },
-    {
-        "name": "A9",
-        "description": "Find similar comments from a text file and save them to an output file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/comments.txt"
-                },
-                "output_filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/comments-similar.txt"
-                }
-            },
-            "required": ["filename", "output_filename"]
-        }
-    },
-    {
-        "name": "A10",
-        "description": "Identify high-value (gold) ticket sales from a database and save them to a text file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.db)",
-                    "default": "/data/ticket-sales.db"
-                },
-                "output_filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "default": "/data/ticket-sales-gold.txt"
-                },
-                "query": {
-                    "type": "string",
-                    "pattern": "SELECT SUM(units * price) FROM tickets WHERE type = 'Gold'"
-                }
-            },
-            "required": ["filename", "output_filename", "query"]
-        }
-    },
-    {
-        "name": "B12",
-        "description": "Check if filepath starts with /data",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "filepath": {
-                    "type": "string",
-                    "pattern": r"^/data/.*",
-                    # "description": "Filepath must start with /data to ensure secure access."
-                }
-            },
-            "required": ["filepath"]
-        }
-    },
-    {
-        "name": "B3",
-        "description": "Download content from a URL and save it to the specified path.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "url": {
-                    "type": "string",
-                    "pattern": r"https?://.*",
-                    "description": "URL to download content from."
-                },
-                "save_path": {
-                    "type": "string",
-                    "pattern": r"./.",
-                    "description": "Path to save the downloaded content."
-                }
-            },
-            "required": ["url", "save_path"]
-        }
-    },
-    {
-        "name": "B5",
-        "description": "Execute a SQL query on a specified database file and save the result to an output file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "db_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.db)",
-                    "description": "Path to the SQLite database file."
-                },
-                "query": {
-                    "type": "string",
-                    "description": "SQL query to be executed on the database."
-                },
-                "output_filename": {
-                    "type": "string",
-                    "pattern": r"./(.\.txt)",
-                    "description": "Path to the file where the query result will be saved."
-                }
-            },
-            "required": ["db_path", "query", "output_filename"]
-        }
-    },
-    {
-        "name": "B6",
-        "description": "Fetch content from a URL and save it to the specified output file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "url": {
-                    "type": "string",
-                    "pattern": r"https?://.*",
-                    "description": "URL to fetch content from."
-                },
-                "output_filename": {
-                    "type": "string",
-                    "pattern": r"./.",
-                    "description": "Path to the file where the content will be saved."
-                }
-            },
-            "required": ["url", "output_filename"]
-        }
-    },
-    {
-        "name": "B7",
-        "description": "Process an image by optionally resizing it and saving the result to an output path.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "image_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.(jpg|jpeg|png|gif|bmp))",
-                    "description": "Path to the input image file."
-                },
-                "output_path": {
-                    "type": "string",
-                    "pattern": r"./.",
-                    "description": "Path to save the processed image."
-                },
-                "resize": {
-                    "type": "array",
-                    "items": {
-                        "type": "integer",
-                        "minimum": 1
-                    },
-                    "minItems": 2,
-                    "maxItems": 2,
-                    "description": "Optional. Resize dimensions as [width, height]."
-                }
-            },
-            "required": ["image_path", "output_path"]
-        }
-    },
-    {
-        "name": "B9",
-        "description": "Convert a Markdown file to another format and save the result to the specified output path.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "md_path": {
-                    "type": "string",
-                    "pattern": r"./(.\.md)",
-                    "description": "Path to the Markdown file to be converted."
-                },
-                "output_path": {
-                    "type": "string",
-                    "pattern": r"./.",
-                    "description": "Path where the converted file will be saved."
-                }
-            },
-            "required": ["md_path", "output_path"]
-        }
-    }
 
-]
+job_queue = JobQueue(execute_task)
 
-def get_completions(prompt: str):
-    with httpx.Client(timeout=20) as client:
-        response = client.post(
-            f"{openai_api_chat}",
-            headers=headers,
-            json={
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": "You are a function classifier that extracts structured parameters from queries."},
-                    {"role": "user", "content": prompt}
-                ],
-                "tools": [
-                    {"type": "function", "function": function}
-                    for function in function_definitions_llm
-                ],
-                "tool_choice": "auto"
-            },
-        )
-    print(response.json()["choices"][0]["message"]["tool_calls"][0]["function"])
-    return response.json()["choices"][0]["message"]["tool_calls"][0]["function"]
 
-# Placeholder for task execution
 @app.post("/run")
-async def run_task(task: str):
+async def run_task(task: str, response: Response, run_async: bool = Query(False, alias="async")):
+    if run_async:
+        try:
+            job_id = job_queue.submit(task)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
     try:
-        # Placeholder logic for executing tasks
-        response = get_completions(task)
-        print(response)
-        task_code = response['name']
-        arguments = response['arguments']
-
-        if "A1" == task_code:
-            A1(**json.loads(arguments))
-        if "A2" == task_code:
-            A2(**json.loads(arguments))
-        if "A3" == task_code:
-            A3(**json.loads(arguments))
-        if "A4" == task_code:
-            A4(**json.loads(arguments))
-        if "A5" == task_code:
-            A5(**json.loads(arguments))
-        if "A6" == task_code:
-            A6(**json.loads(arguments))
-        if "A7" == task_code:
-            A7(**json.loads(arguments))
-        if "A8" == task_code:
-            A8(**json.loads(arguments))
-        if "A9" == task_code:
-            A9(**json.loads(arguments))
-        if "A10" == task_code:
-            A10(**json.loads(arguments))
-
-        if "B12" == task_code:
-            B12(**json.loads(arguments))
-        if "B3" == task_code:
-            B3(**json.loads(arguments))
-        if "B5" == task_code:
-            B5(**json.loads(arguments))
-        if "B6" == task_code:
-            B6(**json.loads(arguments))
-        if "B7" == task_code:
-            B7(**json.loads(arguments))
-        if "B9" == task_code:
-            B9(**json.loads(arguments))
-        return {"message": f"{task_code} Task '{task}' executed successfully"}
+        result = await execute_task(task)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in result["timings"].items())
+    return result
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return job_queue.info()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-@app.get("/read", response_class=PlainTextResponse)
-async def read_file(path: str = Query(..., description="File path to read")):
+@app.get("/read")
+async def read_file(request: Request, path: str = Query(..., description="File path to read")):
     full_path = get_correct_path(path)
     try:
-        with open(full_path, "r") as file:
-            return file.read()
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="File not found")
+        return await serve_file(request, full_path)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_PATH = os.getenv("CLASSIFICATION_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "classification.db"))
+CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("CLASSIFICATION_CACHE_TTL", str(24 * 60 * 60)))
+
+
+# Spans whose case is meaningful: quoted or backticked text, URLs and paths
+LITERAL_RE = re.compile(r"`[^`]*`|\"[^\"]*\"|'[^']*'|https?://\S+|\S*[/\\]\S*")
+
+
+def normalize(task: str) -> str:
+    """Collapse whitespace and case so trivially different prompts share an entry.
+
+    Paths, URLs and quoted spans keep their case: /data/README.md and
+    /data/readme.md are different files, and 'Gold' and 'GOLD' different values.
+    """
+    task = re.sub(r"\s+", " ", task).strip()
+    parts, position = [], 0
+    for literal in LITERAL_RE.finditer(task):
+        parts.append(task[position:literal.start()].casefold())
+        parts.append(literal.group(0))
+        position = literal.end()
+    parts.append(task[position:].casefold())
+    return "".join(parts)
+
+
+def fingerprint(function_definitions) -> str:
+    return hashlib.sha256(json.dumps(function_definitions, sort_keys=True).encode()).hexdigest()
+
+
+class ClassificationCache:
+    """LRU of task text -> tool call, persisted to SQLite.
+
+    Entries expire after ``ttl`` seconds and the whole cache is dropped when the
+    function definitions it was built against change.
+    """
+
+    def __init__(self, path=CACHE_PATH, size=CACHE_SIZE, ttl=CACHE_TTL, version=""):
+        self.path = path
+        self.size = size
+        self.ttl = ttl
+        self.version = version
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "normalized_hits": 0, "misses": 0, "expired": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            "key TEXT PRIMARY KEY, task TEXT NOT NULL, name TEXT NOT NULL, arguments TEXT NOT NULL, "
+            "version TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self.conn.execute("DELETE FROM classifications WHERE version != ?", (version,))
+        self.conn.commit()
+
+    def get(self, task: str):
+        key = normalize(task)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                row = self.conn.execute(
+                    "SELECT task, name, arguments, created FROM classifications WHERE key = ? AND version = ?",
+                    (key, self.version),
+                ).fetchone()
+                if row is not None:
+                    entry = {"task": row[0], "name": row[1], "arguments": row[2], "created": row[3]}
+                    self._remember(key, entry)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if now - entry["created"] > self.ttl:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                self.memory.pop(key, None)
+                self.conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.memory.move_to_end(key)
+            self.stats["exact_hits" if entry["task"] == task else "normalized_hits"] += 1
+            return {"name": entry["name"], "arguments": entry["arguments"]}
+
+    def put(self, task: str, function: dict):
+        key = normalize(task)
+        entry = {"task": task, "name": function["name"], "arguments": function["arguments"], "created": time.time()}
+        with self.lock:
+            self._remember(key, entry)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?, ?, ?)",
+                (key, task, entry["name"], entry["arguments"], self.version, entry["created"]),
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            self.conn.execute("DELETE FROM classifications")
+            self.conn.commit()
+
+    def info(self):
+        with self.lock:
+            lookups = self.stats["exact_hits"] + self.stats["normalized_hits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            persisted = self.conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+            return {
+                **self.stats,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "persisted_entries": persisted,
+                "max_entries": self.size,
+                "ttl": self.ttl,
+            }
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
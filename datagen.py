@@ -15,8 +15,10 @@ import hashlib
 import json
 import os
 import random
+import shutil
 import sqlite3
 import time
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 from faker import Faker
 
@@ -271,29 +273,223 @@ def a10_ticket_sales():
     conn.close()
 
 
+# Dataset sizes the generators above produce. generate() reproduces them exactly
+# with the functions above; any other size switches that dataset to the chunked
+# generators below. Each chunk seeds its own RNG from (email, chunk start), so
+# output is deterministic per email regardless of the number of processes.
+DEFAULT_SIZES = {
+    "dates": 1000,
+    "contacts": 100,
+    "logs": 50,
+    "log_lines": 10,
+    "doc_dirs": 10,
+    "docs_per_dir": 10,
+    "comments": 100,
+    "tickets": 1000,
+}
+CHUNK_SIZES = {"dates": 250_000, "contacts": 20_000, "logs": 200, "doc_dirs": 5, "comments": 10_000, "tickets": 100_000}
+DATE_FORMATS = ["%Y-%m-%d", "%d-%b-%Y", "%b %d, %Y", "%Y/%m/%d %H:%M:%S"]
+
+
+def _chunk_random(email, task, start):
+    rng = random.Random(f"{email}:{task}:{start}")
+    fake = Faker()
+    fake.seed_instance(num(f"{email}:{task}:{start}"))
+    return rng, fake
+
+
+def _dates_chunk(email, start, count, path):
+    rng = random.Random(f"{email}:a3:{start}")
+    first = datetime.date(2000, 1, 1)
+    days = (datetime.date(2024, 12, 31) - first).days
+    # Format each calendar day once per format instead of calling strftime per row
+    tables = [[(first + datetime.timedelta(days=d)).strftime(fmt.split(" %H")[0]) for d in range(days)] for fmt in DATE_FORMATS]
+    timed = len(DATE_FORMATS) - 1
+    lines = []
+    for _ in range(count):
+        f = rng.randrange(len(DATE_FORMATS))
+        day = tables[f][rng.randrange(days)]
+        if f == timed:
+            seconds = rng.randrange(86400)
+            day = f"{day} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        lines.append(day)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def _contacts_chunk(email, start, count, path):
+    rng, fake = _chunk_random(email, "a4", start)
+    # Faker's name providers are slow per call; draw from per-chunk pools instead
+    first_names = [fake.first_name() for _ in range(500)]
+    last_names = [fake.last_name() for _ in range(500)]
+    domains = [fake.free_email_domain() for _ in range(20)]
+    contacts = []
+    for _ in range(count):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        address = f"{first}.{last}{rng.randrange(100)}@{rng.choice(domains)}".lower()
+        contacts.append({"first_name": first, "last_name": last, "email": address})
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(contacts)[1:-1])
+
+
+def _logs_chunk(email, start, count, root, lines, now):
+    rng, fake = _chunk_random(email, "a5", start)
+    for i in range(start, start + count):
+        path = os.path.join(root, "logs", f"log-{i}.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(fake.text() for _ in range(lines)))
+        age = rng.randint(1, 24 * 60 * 60 * 365)
+        os.utime(path, (now - age, now - age))
+
+
+def _docs_chunk(email, start, count, root, per_dir):
+    rng, fake = _chunk_random(email, "a6", start)
+    for d in range(start, start + count):
+        # Suffix indices so names never collide and overwrite each other
+        dirname = os.path.join(root, "docs", f"{fake.word()}-{d}")
+        os.makedirs(dirname, exist_ok=True)
+        for j in range(per_dir):
+            prefix = "\n".join([fake.text() for _ in range(rng.randint(0, 10))])
+            heading = f"# {fake.sentence()}"
+            suffix = "\n".join([fake.text() for _ in range(rng.randint(0, 10))])
+            with open(os.path.join(dirname, f"{fake.word()}-{j}.md"), "w", encoding="utf-8") as f:
+                f.write("\n".join([prefix, heading, suffix]))
+
+
+def _comments_chunk(email, start, count, path):
+    _, fake = _chunk_random(email, "a9", start)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(fake.paragraph() for _ in range(count)))
+
+
+def _submit_chunks(pool, worker, email, total, chunk, *args):
+    return [pool.submit(worker, email, start, min(chunk, total - start), *args) for start in range(0, total, chunk)]
+
+
+def _submit_parts(pool, worker, email, total, chunk, target):
+    """Generate ``target`` in chunks; returns a function that joins the parts."""
+    parts = [(pool.submit(worker, email, start, min(chunk, total - start), f"{target}.part{start}"), f"{target}.part{start}")
+             for start in range(0, total, chunk)]
+
+    def finish(head=b"", separator=b"\n", tail=b""):
+        with open(target, "wb") as out:
+            out.write(head)
+            for i, (future, path) in enumerate(parts):
+                future.result()
+                if i:
+                    out.write(separator)
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, 1 << 20)
+                os.remove(path)
+            out.write(tail)
+
+    return finish
+
+
+def _write_tickets(email, total, target, chunk):
+    """Insert tickets with chunked executemany calls inside one transaction."""
+    if os.path.exists(target):
+        os.remove(target)
+    conn = sqlite3.connect(target, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("CREATE TABLE tickets (type TEXT NOT NULL, units INTEGER NOT NULL, price DECIMAL(10,2) NOT NULL)")
+    ticket_types = ["Gold", "Silver", "Bronze"]
+    conn.execute("BEGIN")
+    for start in range(0, total, chunk):
+        rng = random.Random(f"{email}:a10:{start}")
+        conn.executemany(
+            "INSERT INTO tickets VALUES (?, ?, ?)",
+            [(rng.choice(ticket_types), rng.randint(1, 10), round(rng.uniform(50, 150), 2)) for _ in range(min(chunk, total - start))],
+        )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def _run_generator(name, root, email):
+    config.update(root=root, email=email)
+    globals()[name]()
+
+
+def generate(email, root, sizes=None, workers=None):
+    """Run every generator concurrently across a process pool.
+
+    Datasets at their DEFAULT_SIZES use the original generators; larger ones
+    are built in chunks that stream to disk, so memory stays flat.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    default = {key: sizes[key] == DEFAULT_SIZES[key] for key in sizes}
+    os.makedirs(root, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        finishers = []
+
+        def legacy(name):
+            finishers.append(pool.submit(_run_generator, name, root, email).result)
+
+        legacy("a2_format_markdown")
+        legacy("a7_email")
+        legacy("a8_credit_card_image")
+        if default["dates"]:
+            legacy("a3_dates")
+        else:
+            finishers.append(_submit_parts(pool, _dates_chunk, email, sizes["dates"], CHUNK_SIZES["dates"],
+                                           os.path.join(root, "dates.txt")))
+        if default["contacts"]:
+            legacy("a4_contacts")
+        else:
+            join = _submit_parts(pool, _contacts_chunk, email, sizes["contacts"], CHUNK_SIZES["contacts"],
+                                 os.path.join(root, "contacts.json"))
+            finishers.append(lambda: join(b"[", b", ", b"]"))
+        if default["logs"] and default["log_lines"]:
+            legacy("a5_logs")
+        else:
+            os.makedirs(os.path.join(root, "logs"), exist_ok=True)
+            for future in _submit_chunks(pool, _logs_chunk, email, sizes["logs"], CHUNK_SIZES["logs"],
+                                         root, sizes["log_lines"], time.time()):
+                finishers.append(future.result)
+        if default["doc_dirs"] and default["docs_per_dir"]:
+            legacy("a6_docs")
+        else:
+            for future in _submit_chunks(pool, _docs_chunk, email, sizes["doc_dirs"], CHUNK_SIZES["doc_dirs"],
+                                         root, sizes["docs_per_dir"]):
+                finishers.append(future.result)
+        if default["comments"]:
+            legacy("a9_comments")
+        else:
+            finishers.append(_submit_parts(pool, _comments_chunk, email, sizes["comments"], CHUNK_SIZES["comments"],
+                                           os.path.join(root, "comments.txt")))
+        # Tickets are written here while the pool works on everything else
+        if default["tickets"]:
+            legacy("a10_ticket_sales")
+        else:
+            _write_tickets(email, sizes["tickets"], os.path.join(root, "ticket-sales.db"), CHUNK_SIZES["tickets"])
+        for finish in finishers:
+            finish()
+
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
     parser.add_argument("email")
     parser.add_argument("--root", default="/data")
+    parser.add_argument("--scale", type=float, default=1, help="Multiply every dataset size")
+    for key in DEFAULT_SIZES:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, help=f"Override the {key} size ({DEFAULT_SIZES[key]})")
+    parser.add_argument("--workers", type=int, help="Generator processes (default: CPU count)")
     args = parser.parse_args()
     config["email"] = args.email
     config["root"] = os.path.abspath(args.root)
+    sizes = {key: max(1, round(value * args.scale)) for key, value in DEFAULT_SIZES.items()}
+    # Scale the number of logs and folders, not their lengths
+    sizes["log_lines"], sizes["docs_per_dir"] = DEFAULT_SIZES["log_lines"], DEFAULT_SIZES["docs_per_dir"]
+    sizes.update({key: getattr(args, key) for key in DEFAULT_SIZES if getattr(args, key) is not None})
 
     os.makedirs(config["root"], exist_ok=True)
 
     print("DISCLAIMER: THIS SCRIPT WILL CHANGE BEFORE THE EVALUATION. TREAT THIS AS A GUIDE.")
     print("Files created at", config["root"])
 
-    a2_format_markdown()
-    a3_dates()
-    a4_contacts()
-    a5_logs()
-    a6_docs()
-    a7_email()
-    a8_credit_card_image()
-    a9_comments()
-    a10_ticket_sales()
-
-# DISCLAIMER: THIS SCRIPT WILL CHANGE BEFORE THE EVALUATION. TREAT THIS AS A GUIDE.
\ No newline at end of file
+    generate(config["email"], config["root"], sizes, args.workers)
+
+# DISCLAIMER: THIS SCRIPT WILL CHANGE BEFORE THE EVALUATION. TREAT THIS AS A GUIDE.
@@ -0,0 +1,143 @@
+"""In-process A1 data generation with per-email snapshots.
+
+The generators in the local ``datagen.py`` run once per (email, generator
+version), where the version is a hash of the datagen.py source. Their output
+is stored as a content-addressed snapshot: each file's bytes under
+``objects/`` by sha256, plus a JSON manifest of paths and ages. Later calls
+restore the snapshot into the data root by copy, or by hardlink with
+DATAGEN_RESTORE=link. Hardlinks are faster but share the cached bytes, so
+only use them when nothing rewrites the files in place (A2 does).
+"""
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from utils import file_hash
+
+DATAGEN_CACHE_DIR = Path(os.getenv("DATAGEN_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "datagen"))
+DATAGEN_ROOT = os.getenv("DATAGEN_ROOT", "/data")
+DATAGEN_RESTORE = os.getenv("DATAGEN_RESTORE", "copy")
+DATAGEN_SOURCE = Path(__file__).resolve().with_name("datagen.py")
+GENERATORS = [
+    "a2_format_markdown",
+    "a3_dates",
+    "a4_contacts",
+    "a5_logs",
+    "a6_docs",
+    "a7_email",
+    "a8_credit_card_image",
+    "a9_comments",
+    "a10_ticket_sales",
+]
+
+_lock = threading.Lock()
+
+
+def generator_version():
+    return hashlib.sha256(DATAGEN_SOURCE.read_bytes()).hexdigest()[:16]
+
+
+def snapshot_path(email, version):
+    key = hashlib.sha256(f"{email}\0{version}".encode()).hexdigest()[:32]
+    return DATAGEN_CACHE_DIR / "snapshots" / f"{key}.json"
+
+
+def object_path(digest):
+    return DATAGEN_CACHE_DIR / "objects" / digest[:2] / digest
+
+
+def generate(email, version):
+    """Run every generator for ``email`` and store the output as a snapshot."""
+    import datagen
+
+    DATAGEN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=DATAGEN_CACHE_DIR, prefix=".staging-")
+    try:
+        # datagen works through module globals and the global random state
+        with _lock:
+            state = random.getstate()
+            saved = dict(datagen.config)
+            try:
+                datagen.config.update(root=staging, email=email)
+                for name in GENERATORS:
+                    getattr(datagen, name)()
+            finally:
+                datagen.config.clear()
+                datagen.config.update(saved)
+                random.setstate(state)
+        created = time.time_ns()
+        files = {}
+        for directory, _, names in os.walk(staging):
+            for name in names:
+                path = os.path.join(directory, name)
+                digest = file_hash(path)
+                st = os.stat(path)
+                target = object_path(digest)
+                if not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, target)
+                files[os.path.relpath(path, staging).replace(os.sep, "/")] = {
+                    "hash": digest,
+                    "age_ns": created - st.st_mtime_ns,
+                }
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    snapshot = {"email": email, "version": version, "files": files}
+    path = snapshot_path(email, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return snapshot
+
+
+def load(email, version):
+    try:
+        snapshot = json.loads(snapshot_path(email, version).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if all(object_path(entry["hash"]).exists() for entry in snapshot["files"].values()):
+        return snapshot
+    return None
+
+
+def restore(snapshot, root, mode=DATAGEN_RESTORE):
+    """Materialize a snapshot under ``root``, replacing files of the same name."""
+    now = time.time_ns()
+    for relative, entry in snapshot["files"].items():
+        target = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Unlink first so a previous hardlink is replaced, never written through
+        try:
+            os.unlink(target)
+        except FileNotFoundError:
+            pass
+        source = object_path(entry["hash"])
+        if mode == "link":
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        else:
+            shutil.copyfile(source, target)
+        # Keep the relative ages that A5 sorts logs by
+        mtime = now - entry["age_ns"]
+        os.utime(target, ns=(mtime, mtime))
+    return len(snapshot["files"])
+
+
+def materialize(email, root=DATAGEN_ROOT, mode=DATAGEN_RESTORE):
+    """Restore the data for ``email`` into ``root``, generating it on first use."""
+    version = generator_version()
+    snapshot = load(email, version)
+    cached = snapshot is not None
+    if not cached:
+        snapshot = generate(email, version)
+    os.makedirs(root, exist_ok=True)
+    count = restore(snapshot, root, mode)
+    return {"email": email, "root": os.fspath(root), "files": count, "cached": cached, "version": version}
@@ -0,0 +1,160 @@
+"""Fast date parsing and single-pass weekday histograms for A3.
+
+Lines are reduced to a "shape" (digits -> 9, letters -> a) and the first
+known format that parses a line of that shape is remembered for the rest.
+ISO-like shapes go through ``date.fromisoformat``, the other known ones
+through ``strptime``, and only shapes no known format handles fall back to
+dateutil.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from utils import nested_workers
+
+DATE_CHUNK_BYTES = int(os.getenv("DATE_CHUNK_BYTES", str(4 * 2**20)))
+DATE_PROCESSES = int(os.getenv("DATE_PROCESSES", "1"))
+
+FORMATS = [
+    "%Y-%m-%d",
+    "%d-%b-%Y",
+    "%b %d, %Y",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d %b %Y",
+    "%B %d, %Y",
+    "%d-%B-%Y",
+    "%Y/%m/%d",
+]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_DIGITS = re.compile(r"\d")
+_LETTERS = re.compile(r"[A-Za-z]")
+# shape -> parser(line) -> date
+_parsers = {}
+# Most inputs repeat a limited set of calendar days; memoize them
+_memo = {}
+_MEMO_LIMIT = 200_000
+
+
+def shape(line: str) -> str:
+    return _LETTERS.sub("a", _DIGITS.sub("9", line))
+
+
+def _iso(line):
+    return date.fromisoformat(line[:10])
+
+
+def _iso_slashes(line):
+    return date.fromisoformat(line[:10].replace("/", "-"))
+
+
+def _strptime(fmt):
+    return lambda line: datetime.strptime(line, fmt).date()
+
+
+def _dateutil(line):
+    from dateutil.parser import parse
+
+    return parse(line).date()
+
+
+def _parser_for(line):
+    s = shape(line)
+    parser = _parsers.get(s)
+    if parser is None:
+        parser = _dateutil
+        for fmt in FORMATS:
+            try:
+                datetime.strptime(line, fmt)
+            except ValueError:
+                continue
+            if fmt.startswith("%Y-%m-%d"):
+                parser = _iso
+            elif fmt.startswith("%Y/%m/%d"):
+                parser = _iso_slashes
+            else:
+                parser = _strptime(fmt)
+            break
+        _parsers[s] = parser
+    return parser
+
+
+def parse_date(line: str) -> date:
+    line = line.strip()
+    result = _memo.get(line)
+    if result is None:
+        result = _parser_for(line)(line)
+        if len(_memo) >= _MEMO_LIMIT:
+            _memo.clear()
+        _memo[line] = result
+    return result
+
+
+def _count_range(path, start, stop, chunk_bytes=DATE_CHUNK_BYTES):
+    """Weekday histogram for the lines that start within [start, stop)."""
+    counts = [0] * 7
+    with open(path, "rb") as f:
+        if start:
+            # Skip the partial line; the previous range owns it
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        tail = b""
+        while position < stop:
+            chunk = f.read(min(chunk_bytes, stop - position))
+            if not chunk:
+                break
+            position += len(chunk)
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    counts[parse_date(line.decode("utf-8")).weekday()] += 1
+        # A line that starts before `stop` belongs to this range; read the rest of it
+        if tail:
+            tail += f.readline()
+        if tail.strip():
+            counts[parse_date(tail.decode("utf-8")).weekday()] += 1
+    return counts
+
+
+_histograms = {}
+
+
+def weekday_histogram(path, processes=DATE_PROCESSES):
+    """Count dates per weekday (Monday=0) in one streaming pass over the file.
+
+    Results are cached by (path, size, mtime) so repeated queries for other
+    weekdays on an unchanged file cost a stat.
+    """
+    path = os.fspath(path)
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key in _histograms:
+        return list(_histograms[key])
+
+    size = st.st_size
+    processes = nested_workers(processes)
+    if processes > 1 and size > DATE_CHUNK_BYTES:
+        step = -(-size // processes)
+        ranges = [(start, min(start + step, size)) for start in range(0, size, step)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = pool.map(_count_range, [path] * len(ranges), *zip(*ranges))
+            counts = [sum(day) for day in zip(*parts)]
+    else:
+        counts = _count_range(path, 0, size)
+
+    if len(_histograms) >= 32:
+        _histograms.clear()
+    _histograms[key] = counts
+    return list(counts)
+
+
+def weekday_index(weekday) -> int:
+    """Accept 0-6 (Monday=0) or a weekday name such as "Wednesday"."""
+    if isinstance(weekday, str) and not weekday.isdigit():
+        name = weekday.strip().rstrip("s").capitalize()
+        return WEEKDAYS.index(name)
+    return int(weekday)
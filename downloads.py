@@ -0,0 +1,133 @@
+"""Streaming, resumable HTTP downloads with conditional revalidation.
+
+Bodies are written chunk by chunk to ``<path>.part`` and renamed into place
+once complete, so readers never see a half-written file. The ETag and
+Last-Modified of each URL are remembered: a later download of an unchanged
+URL is answered with 304 and skipped, and an interrupted one continues from
+the end of the partial file with a Range request guarded by If-Range. A 416
+for that range means the partial file is already complete (it is then renamed
+into place) or unusable (it is then discarded and the download restarts).
+"""
+import os
+import sqlite3
+import threading
+import time
+import httpx
+from http_client import get_client
+
+DOWNLOAD_CACHE_PATH = os.getenv("DOWNLOAD_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "downloads.db"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "2"))
+
+
+class ValidatorCache:
+    """url -> (path, etag, last_modified, complete), persisted to SQLite."""
+
+    def __init__(self, path=DOWNLOAD_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            "url TEXT PRIMARY KEY, path TEXT NOT NULL, etag TEXT, last_modified TEXT, complete INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute("SELECT path, etag, last_modified, complete FROM validators WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return {"path": row[0], "etag": row[1], "last_modified": row[2], "complete": bool(row[3])}
+
+    def put(self, url, path, etag, last_modified, complete):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+                (url, path, etag, last_modified, int(complete), time.time()),
+            )
+            self.conn.commit()
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ValidatorCache()
+    return _cache
+
+
+def _request_headers(meta, path, resume_from):
+    # Identity encoding keeps byte offsets meaningful for Range and the bytes binary-exact
+    headers = {"Accept-Encoding": "identity"}
+    if meta is None or meta["path"] != path:
+        return headers
+    if meta["complete"] and os.path.exists(path):
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["last_modified"]:
+            headers["If-Modified-Since"] = meta["last_modified"]
+    elif resume_from and (meta["etag"] or meta["last_modified"]):
+        headers["Range"] = f"bytes={resume_from}-"
+        headers["If-Range"] = meta["etag"] or meta["last_modified"]
+    return headers
+
+
+async def download(url, path, client=None, cache=None, retries=DOWNLOAD_RETRIES):
+    """Download ``url`` to ``path`` and return a summary of what happened.
+
+    ``status`` is "not_modified", "downloaded" or "resumed".
+    """
+    client = client or get_client()
+    cache = cache or get_cache()
+    path = os.fspath(path)
+    part = path + ".part"
+    resumed = False
+    attempt = 0
+    while True:
+        meta = cache.get(url)
+        resume_from = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = _request_headers(meta, path, resume_from)
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return {"status": "not_modified", "bytes": 0, "path": path}
+                if response.status_code == 416 and "Range" in headers:
+                    # The partial file may already hold the whole body (e.g. a
+                    # failure after the last chunk): finish it, else start over
+                    if response.headers.get("content-range", "") == f"bytes */{resume_from}":
+                        os.replace(part, path)
+                        cache.put(url, path, meta["etag"], meta["last_modified"], complete=True)
+                        return {"status": "resumed", "bytes": resume_from, "path": path}
+                    os.remove(part)
+                    cache.put(url, path, None, None, complete=False)
+                    continue
+                response.raise_for_status()
+                append = response.status_code == 206 and "Range" in headers
+                # Identity was only requested; an encoded body is decoded on the
+                # way in, so its offsets no longer match the file and it can't resume
+                encoded = response.headers.get("content-encoding", "identity").lower() not in ("", "identity")
+                if append and encoded:
+                    os.remove(part)
+                    cache.put(url, path, None, None, complete=False)
+                    continue
+                resumed = resumed or append
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                cache.put(url, path, None if encoded else etag, None if encoded else last_modified, complete=False)
+                written = resume_from if append else 0
+                with open(part, "ab" if append else "wb") as f:
+                    async for chunk in (response.aiter_bytes() if encoded else response.aiter_raw()):
+                        f.write(chunk)
+                        written += len(chunk)
+        except httpx.TransportError:
+            # Keep the partial file; the next attempt (or call) resumes from it
+            if attempt == retries:
+                raise
+            attempt += 1
+            continue
+        os.replace(part, path)
+        cache.put(url, path, etag, last_modified, complete=True)
+        return {"status": "resumed" if resumed else "downloaded", "bytes": written, "path": path}
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+from http_client import aiproxy_post
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings.db"))
+
+
+def content_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk map of sha256(model + text) -> float32 vector."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self.lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                ((key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items),
+            )
+            self.conn.commit()
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+
+async def embed(texts, model=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE, concurrency=EMBEDDING_CONCURRENCY, cache=None):
+    """Return a float32 matrix with one embedding row per text.
+
+    Only texts missing from the cache are sent, deduplicated, in batches of
+    ``batch_size`` with at most ``concurrency`` requests in flight.
+    """
+    cache = cache or get_cache()
+    keys = [content_key(model, text) for text in texts]
+    vectors = cache.get_many(set(keys))
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+    missing = list(missing.items())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(batch):
+        async with semaphore:
+            result = await aiproxy_post("embeddings", {"model": model, "input": [text for _, text in batch]})
+        data = sorted(result["data"], key=lambda item: item["index"])
+        fetched = [(key, np.asarray(item["embedding"], dtype=np.float32)) for (key, _), item in zip(batch, data)]
+        cache.put_many(fetched)
+        vectors.update(fetched)
+
+    await asyncio.gather(*(fetch(missing[i : i + batch_size]) for i in range(0, len(missing), batch_size)))
+    if not keys:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([vectors[key] for key in keys])
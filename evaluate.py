@@ -8,6 +8,8 @@
 #     "python-dateutil",
 # ]
 # ///
+import asyncio
+import contextvars
 import hashlib
 import httpx
 import json
@@ -15,8 +17,11 @@ import logging
 import numpy as np
 import os
 import re
+import shutil
 import subprocess
+import time
 from dateutil.parser import parse
+from utils import percentile
 from datagen import (
     get_markdown,
     get_dates,
@@ -43,27 +48,45 @@ def mismatch(msg, expected, result):
     return False
 
 
+_client = None
+# Per-check list of /run timings; each check runs in its own task and context
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def client():
+    """The AsyncClient shared by every check."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=None, max_keepalive_connections=20))
+    return _client
+
+
 async def run(task: str):
-    async with httpx.AsyncClient(timeout=30) as client:
-        logging.warning(f"🟡 Running task: {task.strip()}")
-        response = await client.post("http://localhost:8000/run", params={"task": task})
-        try:
-            response_text = json.dumps(response.json(), indent=2)
-        except json.JSONDecodeError:
-            response_text = response.text
-        if response.status_code < 400:
-            logging.info(f"🟢 HTTP {response.status_code} {response_text}")
-        else:
-            logging.error(f"🔴 HTTP {response.status_code} {response_text}")
-        return response.status_code, response_text
+    logging.warning(f"🟡 Running task: {task.strip()}")
+    start = time.perf_counter()
+    response = await client().post("http://localhost:8000/run", params={"task": task})
+    wall = time.perf_counter() - start
+    try:
+        body = response.json()
+        response_text = json.dumps(body, indent=2)
+    except json.JSONDecodeError:
+        body, response_text = None, response.text
+    timings = _timings.get()
+    if timings is not None:
+        server = body.get("timings", {}) if isinstance(body, dict) else {}
+        timings.append({"wall": wall, "classify": server.get("classify"), "execute": server.get("execute")})
+    if response.status_code < 400:
+        logging.info(f"🟢 HTTP {response.status_code} {response_text}")
+    else:
+        logging.error(f"🔴 HTTP {response.status_code} {response_text}")
+    return response.status_code, response_text
 
 
 async def read(path: str):
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(f"http://localhost:8000/read?path={path}")
-        if response.status_code != 200:
-            raise Exception(f"Cannot read {path}")
-        return response.text
+    response = await client().get(f"http://localhost:8000/read?path={path}")
+    if response.status_code != 200:
+        raise Exception(f"Cannot read {path}")
+    return response.text
 
 
 async def a1(email: str, **kwargs):
@@ -78,14 +101,17 @@ with `{email}` as the only argument
 
 async def a2(email: str, file: str = "/data/format.md", **kwargs):
     original = get_markdown(email)
-    expected = subprocess.run(
-        ["npx", "prettier@3.4.2", "--stdin-filepath", file],
-        input=original,
-        capture_output=True,
-        text=True,
-        check=True,
-        # Ensure npx is picked up from the PATH on Windows
-        shell=True,
+    # A one-shot CLI run, independent of the daemon that A2 formats with
+    expected = (
+        await asyncio.to_thread(
+            subprocess.run,
+            # which() also finds npx.cmd on Windows
+            [shutil.which("npx") or "npx", "prettier@3.4.2", "--stdin-filepath", file],
+            input=original,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
     ).stdout
     result = await run(
         f"""
@@ -192,12 +218,11 @@ async def a8(email, **kwargs):
 
 async def a9(email, **kwargs):
     data = get_comments(email)
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.post(
-            f"{openai_api_base}/embeddings",
-            headers={"Authorization": f"Bearer {openai_api_key}"},
-            json={"model": "text-embedding-3-small", "input": data},
-        )
+    response = await client().post(
+        f"{openai_api_base}/embeddings",
+        headers={"Authorization": f"Bearer {openai_api_key}"},
+        json={"model": "text-embedding-3-small", "input": data},
+    )
     embeddings = np.array([emb["embedding"] for emb in response.json()["data"]])
     similarity = np.dot(embeddings, embeddings.T)
     # Create mask to ignore diagonal (self-similarity)
@@ -232,31 +257,95 @@ async def a10(email, **kwargs):
     return True
 
 
-async def main(email: str):
-    score, total = 0, 0
-    for task in [a1, a2, a3, a4, a5, a6, a7, a8, a9, a10]:
-        total += 1
-        try:
-            success = await task(email=email)
-        except Exception as e:
-            logging.error(f"🔴 {task.__name__.upper()} failed: {e}")
-            success = False
-        if success:
-            logging.info(f"✅ {task.__name__.upper()} PASSED")
-        else:
-            logging.error(f"❌ {task.__name__.upper()} FAILED")
-        score += 1 if success else 0
-    logging.info(f"🎯 Score: {score} / {total}")
+async def check(task, email):
+    """Run one check and return its outcome with wall, classify and execute times."""
+    timings = []
+    _timings.set(timings)
+    start = time.perf_counter()
+    try:
+        success = bool(await task(email=email))
+    except Exception as e:
+        logging.error(f"🔴 {task.__name__.upper()} failed: {e}")
+        success = False
+    if success:
+        logging.info(f"✅ {task.__name__.upper()} PASSED")
+    else:
+        logging.error(f"❌ {task.__name__.upper()} FAILED")
+
+    def total(key):
+        values = [t[key] for t in timings if t[key] is not None]
+        return sum(values) if values else None
+
+    return {
+        "task": task.__name__,
+        "success": success,
+        "wall": time.perf_counter() - start,
+        "classify": total("classify"),
+        "execute": total("execute"),
+    }
+
+
+def summarize(results):
+    """Per-task pass counts and p50/p95/p99 of each timing."""
+    summary = {}
+    for name in dict.fromkeys(r["task"] for r in results):
+        runs = [r for r in results if r["task"] == name]
+        summary[name] = {"runs": len(runs), "passed": sum(r["success"] for r in runs)}
+        for key in ("wall", "classify", "execute"):
+            values = [r[key] for r in runs if r[key] is not None]
+            summary[name][key] = {f"p{q}": percentile(values, q) for q in (50, 95, 99)} if values else None
+    return summary
+
+
+def print_table(summary):
+    def ms(stats, q):
+        return f"{stats[q] * 1000:9.0f}" if stats else f"{'-':>9}"
+
+    labels = {"wall": "wall", "classify": "cls", "execute": "exec"}
+    header = f"{'task':<5} {'pass':>7}" + "".join(f" {labels[key] + ' ' + q:>9}" for key in labels for q in ("p50", "p95", "p99"))
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        cells = "".join(f" {ms(row[key], q)}" for key in ("wall", "classify", "execute") for q in ("p50", "p95", "p99"))
+        print(f"{name:<5} {str(row['passed']) + '/' + str(row['runs']):>7}{cells}")
+    print("(milliseconds)")
+
+
+async def main(email: str, repeat: int = 1, output: str = None):
+    results = []
+    started = time.time()
+    try:
+        for _ in range(repeat):
+            # a1 regenerates /data, which every other check reads, and a2 is not
+            # idempotent, so each round starts from fresh data
+            results.append(await check(a1, email))
+            results.extend(await asyncio.gather(*(check(task, email) for task in [a2, a3, a4, a5, a6, a7, a8, a9, a10])))
+    finally:
+        global _client
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+    score = sum(r["success"] for r in results)
+    logging.info(f"🎯 Score: {score} / {len(results)}")
+    summary = summarize(results)
+    print_table(summary)
+    if output:
+        report = {"email": email, "repeat": repeat, "started": started, "score": score, "total": len(results), "summary": summary, "runs": results}
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Report written to {output}")
+    return summary
 
 
 if __name__ == "__main__":
-    import asyncio
     import argparse
 
     parser = argparse.ArgumentParser(description="Evaluate tasks with configurable logging")
     parser.add_argument("--email", default="user@example.com", help="Set the email address")
     levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
     parser.add_argument("--log-level", default="INFO", choices=levels, help="Set logging level")
+    parser.add_argument("--repeat", type=int, default=1, help="Run every check this many times")
+    parser.add_argument("--output", default="evaluation.json", help="Write the timing report as JSON here")
     args = parser.parse_args()
     logging.basicConfig(level=args.log_level, format="%(message)s\n")
-    asyncio.run(main(args.email))
\ No newline at end of file
+    asyncio.run(main(args.email, args.repeat, args.output))
@@ -0,0 +1,178 @@
+"""Bounded-memory sorting of large JSON arrays.
+
+Records are streamed out of the source array, their sort key is computed
+once, and sorted runs that exceed the memory budget are spilled to JSON
+Lines files next to the output. The runs are then merged with
+``heapq.merge`` and the result is streamed to the target file.
+"""
+import heapq
+import json
+import locale
+import os
+import sys
+import tempfile
+
+SORT_MEMORY_MB = float(os.getenv("SORT_MEMORY_MB", "64"))
+READ_CHUNK_CHARS = 1 << 20
+# Records measured exactly before switching to sampling every SAMPLE_EVERY-th
+SAMPLE_FIRST = 256
+SAMPLE_EVERY = 1024
+# List slot plus the transient (key, sequence) slice built while sorting
+SORT_OVERHEAD = 8 + 64
+
+_decoder = json.JSONDecoder()
+_compact = json.JSONEncoder(separators=(",", ":")).encode
+_indented = json.JSONEncoder(indent=4).encode
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(path, chunk_chars=READ_CHUNK_CHARS):
+    """Yield (item, serialized size) for each element of a top-level JSON array."""
+    with open(path, "r", encoding="utf-8") as f:
+        buffer, position, eof = "", 0, False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = f.read(chunk_chars)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def skip(chars):
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in chars:
+                    position += 1
+                if position < len(buffer) or eof:
+                    return
+                fill()
+
+        fill()
+        skip(_WHITESPACE)
+        if buffer[position : position + 1] != "[":
+            raise ValueError(f"{path} does not contain a JSON array")
+        position += 1
+        while True:
+            skip(_WHITESPACE + ",")
+            if position >= len(buffer):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+                # A value that runs to the end of the buffer may be cut short (e.g. a number)
+                complete = end < len(buffer) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                fill()
+                continue
+            yield item, end - position
+            position = end
+
+
+def deep_size(value):
+    """Approximate bytes held by a parsed JSON value, including its containers."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k) + deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_size(v) for v in value)
+    return size
+
+
+def _sort_key(fields, collate):
+    # Numbers keep their value and sort before everything else, which compares as text
+    text = locale.strxfrm if collate else str
+
+    def field_key(value):
+        if isinstance(value, (int, float)):
+            return (0, value)
+        return (1, text(value if isinstance(value, str) else str(value)))
+
+    return lambda record: tuple(field_key(record.get(field, "")) for field in fields)
+
+
+def _write_run(records, spill_dir):
+    with tempfile.NamedTemporaryFile("w", dir=spill_dir, prefix=".sort-", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+        for key, sequence, record in records:
+            f.write(_compact([key, sequence, record]))
+            f.write("\n")
+    return f.name
+
+
+def _read_run(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            key, sequence, record = _decoder.decode(line)
+            yield tuple(map(tuple, key)), sequence, record
+
+
+def _write_array(records, target, compact):
+    with open(target, "w", encoding="utf-8") as out:
+        first = True
+        for _, _, record in records:
+            if compact:
+                out.write(("[" if first else ",") + _compact(record))
+            else:
+                text = _indented(record).replace("\n", "\n    ")
+                out.write(("[\n    " if first else ",\n    ") + text)
+            first = False
+        if first:
+            out.write("[]")
+        else:
+            out.write("]" if compact else "\n]")
+
+
+def sort_json_array(source, target, fields, memory_mb=SORT_MEMORY_MB, spill_dir=None, locale_name=None, compact=False):
+    """Sort the records of the JSON array in ``source`` by ``fields`` into ``target``.
+
+    ``memory_mb`` bounds the in-memory size of the batch of parsed records,
+    their sort keys and the sort's own overhead, estimated from ``deep_size``
+    of sampled records scaled by their serialized size. ``locale_name`` enables
+    locale-aware collation of text ("" means the environment's locale); the
+    previous LC_COLLATE is restored afterwards. Returns the number of spilled
+    runs.
+    """
+    if locale_name is not None:
+        previous_locale = locale.setlocale(locale.LC_COLLATE)
+        locale.setlocale(locale.LC_COLLATE, locale_name)
+    key = _sort_key(fields, locale_name is not None)
+    spill_dir = spill_dir or os.path.dirname(os.path.abspath(target))
+    budget = memory_mb * 2**20
+
+    runs, batch, size = [], [], 0
+    # Parsed records are several times larger than their JSON text; the ratio is
+    # measured on a sample and applied to every record's serialized size
+    measured, serialized = 0, 0
+    try:
+        for sequence, (record, record_size) in enumerate(iter_json_array(source)):
+            item = (key(record), sequence, record)
+            batch.append(item)
+            if sequence < SAMPLE_FIRST or sequence % SAMPLE_EVERY == 0:
+                measured += deep_size(item) + SORT_OVERHEAD
+                serialized += record_size
+            size += record_size * measured / max(serialized, 1)
+            if size >= budget:
+                batch.sort(key=lambda item: item[:2])
+                runs.append(_write_run(batch, spill_dir))
+                batch, size = [], 0
+        batch.sort(key=lambda item: item[:2])
+        if not runs:
+            _write_array(batch, target, compact)
+            return 0
+        if batch:
+            runs.append(_write_run(batch, spill_dir))
+            batch = []
+        _write_array(heapq.merge(*(_read_run(run) for run in runs), key=lambda item: item[:2]), target, compact)
+        return len(runs)
+    finally:
+        for run in runs:
+            try:
+                os.remove(run)
+            except FileNotFoundError:
+                pass
+        if locale_name is not None:
+            locale.setlocale(locale.LC_COLLATE, previous_locale)
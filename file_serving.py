@@ -0,0 +1,239 @@
+import asyncio
+import glob
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+import tempfile
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+READ_CACHE_BYTES = int(os.getenv("READ_CACHE_BYTES", str(64 * 2**20)))
+READ_CACHE_MAX_ENTRY = int(os.getenv("READ_CACHE_MAX_ENTRY", str(2**20)))
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# Larger files are served uncompressed rather than paying for a full compression pass
+COMPRESS_MAX_BYTES = int(os.getenv("COMPRESS_MAX_BYTES", str(100 * 2**20)))
+# Outdated sidecars younger than this may still be streaming to a client
+COMPRESS_STALE_SECONDS = float(os.getenv("COMPRESS_STALE_SECONDS", "300"))
+COMPRESS_CHUNK = 2**20
+COMPRESS_CACHE_DIR = os.getenv("COMPRESS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "compressed"))
+# Formats that are already compressed gain nothing from another pass
+COMPRESSED_SUFFIXES = (
+    ".gz", ".tgz", ".br", ".zst", ".xz", ".bz2", ".zip", ".7z",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".mp3", ".mp4", ".webm", ".pdf",
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODING_SUFFIXES = {"br": "br", "gzip": "gz"}
+
+
+def etag(st: os.stat_result, encoding: str = None) -> str:
+    suffix = f"-{ENCODING_SUFFIXES[encoding]}" if encoding else ""
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}{suffix}"'
+
+
+def validator_headers(st: os.stat_result, encoding: str = None) -> dict:
+    return {
+        "ETag": etag(st, encoding),
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": "no-cache",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def is_not_modified(request: Request, st: os.stat_result) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        current = {etag(st)} | {etag(st, encoding) for encoding in ENCODING_SUFFIXES}
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or bool(current & tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(st.st_mtime) <= since
+    return False
+
+
+class HotFileCache:
+    """Byte-budgeted LRU of small file contents, validated against a fresh stat."""
+
+    def __init__(self, max_bytes=READ_CACHE_BYTES, max_entry=READ_CACHE_MAX_ENTRY):
+        self.max_bytes = max_bytes
+        self.max_entry = max_entry
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, path: str, st: os.stat_result):
+        if st.st_size > self.max_entry:
+            return None
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == (st.st_ino, st.st_size, st.st_mtime_ns):
+            self.entries.move_to_end(path)
+            self.stats["hits"] += 1
+            return entry[1]
+        self.stats["misses"] += 1
+        with open(path, "rb") as f:
+            content = f.read()
+        # The file changed between stat and read; serve it but don't keep it
+        if len(content) == st.st_size:
+            self._put(path, (st.st_ino, st.st_size, st.st_mtime_ns), content)
+        return content
+
+    def invalidate(self, path: str):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+            self.stats["invalidations"] += 1
+
+    def info(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _put(self, path, signature, content):
+        previous = self.entries.pop(path, None)
+        if previous is not None:
+            self.size -= len(previous[1])
+        self.entries[path] = (signature, content)
+        self.size += len(content)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.stats["evictions"] += 1
+
+
+read_cache = HotFileCache()
+
+
+def stat_file(full_path: str) -> os.stat_result:
+    try:
+        st = os.stat(full_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    return st
+
+
+def negotiate_encoding(accept_encoding: str):
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    scored = [(weights.get(name, weights.get("*", 0.0)), -i, name) for i, name in enumerate(candidates)]
+    q, _, name = max(scored)
+    return name if q > 0 else None
+
+
+def _compress(source: str, target: str, encoding: str):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as out:
+            if encoding == "br":
+                compressor = brotli.Compressor()
+                for chunk in iter(lambda: src.read(COMPRESS_CHUNK), b""):
+                    out.write(compressor.process(chunk))
+                out.write(compressor.finish())
+            else:
+                with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6, mtime=0) as gz:
+                    for chunk in iter(lambda: src.read(COMPRESS_CHUNK), b""):
+                        gz.write(chunk)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _remove_stale(prefix: str, suffix: str, current: str):
+    cutoff = time.time() - COMPRESS_STALE_SECONDS
+    for stale in glob.glob(f"{glob.escape(prefix)}-*.{suffix}"):
+        try:
+            if stale != current and os.stat(stale).st_mtime < cutoff:
+                os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+
+# sidecar path -> task building it, so concurrent requests share one build
+_builds = {}
+
+
+async def compressed_sidecar(full_path: str, st: os.stat_result, encoding: str) -> str:
+    """Return the path of a compressed copy of full_path, building it if the source changed."""
+    prefix = os.path.join(COMPRESS_CACHE_DIR, hashlib.sha256(os.path.abspath(full_path).encode()).hexdigest()[:32])
+    suffix = ENCODING_SUFFIXES[encoding]
+    sidecar = f"{prefix}-{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}.{suffix}"
+    if not os.path.exists(sidecar):
+        build = _builds.get(sidecar)
+        if build is None:
+            os.makedirs(COMPRESS_CACHE_DIR, exist_ok=True)
+            build = _builds[sidecar] = asyncio.ensure_future(asyncio.to_thread(_compress, full_path, sidecar, encoding))
+            build.add_done_callback(lambda _: _builds.pop(sidecar, None))
+        await asyncio.shield(build)
+        _remove_stale(prefix, suffix, sidecar)
+    return sidecar
+
+
+def _compressible(request: Request, full_path: str, st: os.stat_result):
+    if "range" in request.headers or not COMPRESS_MIN_BYTES <= st.st_size <= COMPRESS_MAX_BYTES:
+        return None
+    if full_path.lower().endswith(COMPRESSED_SUFFIXES):
+        return None
+    return negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+
+async def serve_file(request: Request, full_path: str) -> Response:
+    """Serve a file with conditional GET, Range and content-encoding support.
+
+    Compressible files are served from a gzip/brotli sidecar when the client
+    accepts it. Small bodies come from the hot-file cache. Everything else, and
+    any Range request, goes to FileResponse, which streams from disk in chunks
+    (or hands the path to the server when it supports the
+    ``http.response.pathsend`` extension) and honours If-Range.
+    """
+    st = stat_file(full_path)
+    encoding = _compressible(request, full_path, st)
+    headers = validator_headers(st, encoding)
+    if is_not_modified(request, st):
+        return Response(status_code=304, headers=headers)
+    media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    body_path, body_st = full_path, st
+    if encoding:
+        body_path = await compressed_sidecar(full_path, st, encoding)
+        body_st = os.stat(body_path)
+        headers["Content-Encoding"] = encoding
+        # Ranges would apply to the encoded bytes; only offer them on the identity form
+        del headers["Accept-Ranges"]
+    if "range" not in request.headers:
+        content = read_cache.get(body_path, body_st)
+        if content is not None:
+            return Response(content, headers=headers, media_type=media_type)
+    return FileResponse(body_path, headers=headers, stat_result=body_st, media_type=media_type)
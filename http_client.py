@@ -0,0 +1,60 @@
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AIPROXY_BASE = "http://aiproxy.sanand.workers.dev/openai/v1"
+AIPROXY_TOKEN = os.getenv("AIPROXY_TOKEN")
+
+# Pool limits, overridable from the environment
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+_client = None
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return os.getenv("HTTP_HTTP2", "1") != "0"
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the application-wide async client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def aiproxy_headers():
+    return {"Authorization": f"Bearer {AIPROXY_TOKEN}", "Content-Type": "application/json"}
+
+
+async def aiproxy_post(path: str, body: dict) -> dict:
+    """POST a JSON body to the AI proxy and return the decoded response."""
+    response = await get_client().post(f"{AIPROXY_BASE}/{path.lstrip('/')}", headers=aiproxy_headers(), json=body)
+    response.raise_for_status()
+    return response.json()
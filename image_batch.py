@@ -0,0 +1,122 @@
+"""Batch image resizing for B7.
+
+JPEGs are decoded with ``Image.draft`` at the smallest power-of-two scale
+that still covers the target size, and other formats shrink through
+``reduce`` before the final resample. Batches fan out across a process pool
+and a manifest of source hashes lets unchanged images be skipped.
+"""
+import functools
+import glob
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from utils import file_hash, nested_workers
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 1)))
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff")
+MANIFEST_NAME = ".images-manifest.json"
+
+
+def process_image(source, target, size=None, mode="resize"):
+    """Write ``source`` to ``target`` scaled to ``size`` ([width, height]).
+
+    mode "resize" scales to exactly size, "thumbnail" fits within it keeping
+    the aspect ratio, and "fit" crops to the aspect ratio and fills it.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        if size:
+            width, height = size
+            if mode == "thumbnail":
+                scale = min(width / img.width, height / img.height)
+            elif mode == "fit":
+                scale = max(width / img.width, height / img.height)
+            else:
+                scale = None
+            if img.format == "JPEG":
+                # Decode straight to a reduced scale that still covers the output
+                if scale is None:
+                    img.draft(None, (width, height))
+                elif scale < 1:
+                    img.draft(None, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+            if mode == "thumbnail":
+                img.thumbnail((width, height), reducing_gap=3.0)
+                result = img
+            elif mode == "fit":
+                result = ImageOps.fit(img, (width, height))
+            else:
+                result = img.resize((width, height), reducing_gap=3.0)
+        else:
+            result = img
+        result.save(target)
+    return target
+
+
+def _expand(pattern):
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name) for name in os.listdir(pattern) if name.lower().endswith(IMAGE_SUFFIXES)
+        )
+    return sorted(path for path in glob.glob(pattern) if path.lower().endswith(IMAGE_SUFFIXES))
+
+
+def _collect(outcomes, manifest, failed):
+    """Wait for each (result getter, target, record) and update the manifest."""
+    for result, target, record in outcomes:
+        try:
+            result()
+            manifest[target] = record
+        except Exception as e:
+            failed[target] = str(e)
+            manifest.pop(target, None)
+
+
+def process_batch(pattern, output_dir, size=None, mode="resize", workers=IMAGE_WORKERS):
+    """Process every image matched by a directory or glob into ``output_dir``.
+
+    Images whose content hash and options match the previous run are skipped.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+
+    options = {"resize": list(size) if size else None, "mode": mode}
+    pending, skipped = [], []
+    for source in _expand(pattern):
+        target = os.path.join(output_dir, os.path.basename(source))
+        st = os.stat(source)
+        entry = manifest.get(target)
+        # Only hash when the cheap stat check says the file may have changed
+        if entry and entry["mtime"] == st.st_mtime_ns and entry["bytes"] == st.st_size:
+            digest = entry["hash"]
+        else:
+            digest = file_hash(source)
+        record = {"source": source, "hash": digest, "mtime": st.st_mtime_ns, "bytes": st.st_size, **options}
+        if (entry and os.path.exists(target) and entry["source"] == source and entry["hash"] == digest
+                and all(entry.get(key) == value for key, value in options.items())):
+            skipped.append(target)
+            manifest[target] = record
+        else:
+            pending.append((source, target, record))
+
+    failed = {}
+    workers = nested_workers(workers)
+    if len(pending) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            _collect([(pool.submit(process_image, source, target, size, mode).result, target, record)
+                      for source, target, record in pending], manifest, failed)
+    else:
+        _collect([(functools.partial(process_image, source, target, size, mode), target, record)
+                  for source, target, record in pending], manifest, failed)
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+    return {"processed": len(pending) - len(failed), "skipped": len(skipped), "failed": failed}
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+JOBS_PATH = os.getenv("JOBS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Bounded pool of asyncio workers running ``runner(task)`` for queued jobs.
+
+    Jobs are persisted to SQLite so queued or interrupted jobs are picked up
+    again after a restart.
+    """
+
+    def __init__(self, runner, path=JOBS_PATH, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE):
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue = None
+        self.tasks = []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, task TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self.conn.commit()
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        # Anything left running by a previous process never finished; run it again
+        self.conn.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+        self.conn.commit()
+        for (job_id,) in self.conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created"):
+            self.queue.put_nowait(job_id)
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, task: str) -> str:
+        if self.queue.qsize() >= self.max_pending:
+            raise QueueFull(f"Job queue is full ({self.max_pending} pending)")
+        job_id = uuid.uuid4().hex
+        self.conn.execute(
+            "INSERT INTO jobs (id, task, status, created) VALUES (?, ?, 'queued', ?)", (job_id, task, time.time())
+        )
+        self.conn.commit()
+        self.queue.put_nowait(job_id)
+        return job_id
+
+    def get(self, job_id: str):
+        row = self.conn.execute(
+            "SELECT id, task, status, result, error, created, started, finished FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "task", "status", "result", "error", "created", "started", "finished"]
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def info(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "depth": self.queue.qsize() if self.queue else 0,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "counts": {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")},
+        }
+
+    async def _work(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                row = self.conn.execute("SELECT task FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)).fetchone()
+                if row is None:
+                    continue
+                self._update(job_id, status="running", started=time.time())
+                try:
+                    result = await self.runner(row[0])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._update(job_id, status="failed", error=str(e), finished=time.time())
+                else:
+                    self._update(job_id, status="done", result=json.dumps(result, default=str), finished=time.time())
+            finally:
+                self.queue.task_done()
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+        self.conn.commit()
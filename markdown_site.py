@@ -0,0 +1,130 @@
+"""Incremental Markdown to HTML builds for B9.
+
+Each process keeps one ``markdown.Markdown`` instance and resets it between
+files instead of building a converter per call. A directory build records the
+mtime, size and content hash of every source in a manifest, so unchanged files
+are skipped without being read and a one-file edit converts one file. Outputs
+are written to a temporary file and renamed into place.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from utils import file_hash, nested_workers, scan_files
+
+MARKDOWN_WORKERS = int(os.getenv("MARKDOWN_WORKERS", str(os.cpu_count() or 1)))
+MARKDOWN_EXTENSIONS = [name for name in os.getenv("MARKDOWN_EXTENSIONS", "").split(",") if name]
+# Below this many changed files, converting in-process beats starting a pool
+MARKDOWN_INLINE_LIMIT = int(os.getenv("MARKDOWN_INLINE_LIMIT", "64"))
+MARKDOWN_CHUNK = int(os.getenv("MARKDOWN_CHUNK", "64"))
+MANIFEST_NAME = ".markdown-manifest.json"
+
+_converter = None
+
+
+def converter():
+    global _converter
+    if _converter is None:
+        import markdown
+        _converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return _converter
+
+
+def atomic_write(path, text):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def convert_file(source, target):
+    """Convert one Markdown file and return the sha256 of its contents."""
+    with open(source, "rb") as f:
+        data = f.read()
+    md = converter()
+    atomic_write(target, md.reset().convert(data.decode("utf-8")))
+    return hashlib.sha256(data).hexdigest()
+
+
+def _convert_chunk(jobs):
+    results = []
+    for source, target in jobs:
+        try:
+            results.append((target, convert_file(source, target), None))
+        except Exception as e:
+            results.append((target, None, str(e)))
+    return results
+
+
+def build_site(source_dir, output_dir, workers=MARKDOWN_WORKERS):
+    """Convert every .md file under ``source_dir`` to .html under ``output_dir``.
+
+    Outputs of deleted sources are removed. Returns counts of what was done.
+    """
+    source_dir = os.path.abspath(source_dir)
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+
+    manifest, pending = {}, []
+    for relative, mtime, size in scan_files(source_dir, ".md", skip=output_dir):
+        source = os.path.join(source_dir, relative)
+        target = os.path.join(output_dir, relative[:-3] + ".html")
+        entry = previous.get(relative)
+        if entry and os.path.exists(target):
+            if entry["mtime"] == mtime and entry["size"] == size:
+                manifest[relative] = entry
+                continue
+            # Touched but not edited: keep the output, refresh the stat
+            if entry["hash"] == file_hash(source):
+                manifest[relative] = {**entry, "mtime": mtime, "size": size}
+                continue
+        manifest[relative] = {"mtime": mtime, "size": size, "hash": None}
+        pending.append((source, target))
+
+    removed = 0
+    for relative in previous.keys() - manifest.keys():
+        try:
+            os.unlink(os.path.join(output_dir, relative[:-3] + ".html"))
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    workers = nested_workers(workers)
+    if len(pending) <= MARKDOWN_INLINE_LIMIT or workers <= 1:
+        results = _convert_chunk(pending)
+    else:
+        chunks = [pending[i:i + MARKDOWN_CHUNK] for i in range(0, len(pending), MARKDOWN_CHUNK)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = [result for chunk in pool.map(_convert_chunk, chunks) for result in chunk]
+
+    failed = {}
+    prefix_length = len(output_dir) + 1
+    for target, digest, error in results:
+        relative = target[prefix_length:-5] + ".md"
+        if error is None:
+            manifest[relative]["hash"] = digest
+        else:
+            failed[relative] = error
+            del manifest[relative]
+
+    if manifest != previous:
+        atomic_write(manifest_path, json.dumps(manifest))
+    return {
+        "converted": len(pending) - len(failed),
+        "skipped": len(manifest) - (len(pending) - len(failed)),
+        "removed": removed,
+        "failed": failed,
+    }
@@ -0,0 +1,76 @@
+// Long-lived Prettier formatter driven by prettier_daemon.py.
+//
+// Usage: node prettier_daemon.js <install dir>
+//
+// Loads the prettier package installed under <install dir> once, then reads
+// one JSON request per line on stdin and writes one JSON response per line on
+// stdout:
+//   {"id": 1, "files": ["/data/a.md", ...]}  -> formats the files in place
+//   {"id": 2, "text": "...", "filepath": "/data/a.md"}  -> returns the output
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const { createRequire } = require("module");
+const { pathToFileURL } = require("url");
+
+async function loadPrettier(dir) {
+  const resolved = createRequire(path.join(path.resolve(dir), "package.json")).resolve("prettier");
+  const mod = await import(pathToFileURL(resolved).href);
+  return typeof mod.format === "function" ? mod : mod.default;
+}
+
+async function options(prettier, filepath) {
+  const config = (await prettier.resolveConfig(filepath, { editorconfig: true })) || {};
+  return { ...config, filepath };
+}
+
+async function formatFile(prettier, file) {
+  const info = await prettier.getFileInfo(file, { ignorePath: ".prettierignore" });
+  if (info.ignored) return { file, ignored: true };
+  const text = fs.readFileSync(file, "utf8");
+  const output = await prettier.format(text, await options(prettier, file));
+  if (output !== text) fs.writeFileSync(file, output);
+  return { file, changed: output !== text };
+}
+
+async function handle(prettier, request) {
+  if (request.files) {
+    const results = [];
+    for (const file of request.files) {
+      try {
+        results.push(await formatFile(prettier, file));
+      } catch (error) {
+        results.push({ file, error: String(error.message || error) });
+      }
+    }
+    return { id: request.id, results };
+  }
+  const output = await prettier.format(request.text, await options(prettier, request.filepath));
+  return { id: request.id, output };
+}
+
+async function main() {
+  const prettier = await loadPrettier(process.argv[2] || ".");
+  process.stdout.write(JSON.stringify({ ready: true, version: prettier.version }) + "\n");
+  const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  for await (const line of lines) {
+    if (!line.trim()) continue;
+    let response;
+    try {
+      const request = JSON.parse(line);
+      try {
+        response = await handle(prettier, request);
+      } catch (error) {
+        response = { id: request.id, error: String(error.message || error) };
+      }
+    } catch (error) {
+      response = { id: null, error: String(error.message || error) };
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+  }
+}
+
+main().catch((error) => {
+  process.stderr.write(`prettier_daemon: ${error.stack || error}\n`);
+  process.exit(1);
+});
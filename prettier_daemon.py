@@ -0,0 +1,168 @@
+"""Persistent Prettier processes, one per version.
+
+The first call for a version installs it under PRETTIER_CACHE_DIR and starts
+``prettier_daemon.js``, which keeps Prettier loaded and formats whole batches
+of files per request over stdin/stdout. Later calls reuse the running process,
+so npx resolution and Node startup are paid once instead of per file. If Node
+or the install is unavailable, calls fall back to a one-shot ``npx`` run.
+"""
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+PRETTIER_CACHE_DIR = Path(os.getenv("PRETTIER_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "prettier"))
+NODE = os.getenv("NODE", shutil.which("node") or "node")
+NPM = os.getenv("NPM", shutil.which("npm") or "npm")
+NPX = os.getenv("NPX", shutil.which("npx") or r"C:\Program Files\nodejs\npx.cmd")
+# After a failed install or start, use npx for this long before trying again
+PRETTIER_RETRY_SECONDS = float(os.getenv("PRETTIER_RETRY_SECONDS", "300"))
+# Longest a single request (or startup) may take before the process is killed
+PRETTIER_TIMEOUT = float(os.getenv("PRETTIER_TIMEOUT", "60"))
+SCRIPT = Path(__file__).resolve().with_name("prettier_daemon.js")
+
+
+class PrettierDaemon:
+    """One Node process with ``spec`` (e.g. "prettier@3.4.2") loaded."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.directory = PRETTIER_CACHE_DIR / spec
+        self.process = None
+        self.lines = None
+        self.version = None
+        self.next_id = 0
+        self.failed_at = None
+        self.lock = threading.Lock()
+
+    def _install(self):
+        if (self.directory / "node_modules" / "prettier" / "package.json").exists():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            [NPM, "install", "--no-save", "--no-audit", "--no-fund", "--prefix", str(self.directory), self.spec],
+            check=True,
+            capture_output=True,
+        )
+
+    def _start(self):
+        if self.failed_at is not None and time.monotonic() - self.failed_at < PRETTIER_RETRY_SECONDS:
+            raise RuntimeError(f"{self.spec} formatter failed recently")
+        try:
+            self._install()
+        except (OSError, subprocess.CalledProcessError):
+            self.failed_at = time.monotonic()
+            raise
+        self.process = subprocess.Popen(
+            [NODE, str(SCRIPT), str(self.directory)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        # Pipes can't be read with a timeout portably, so a thread feeds a queue
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.process.stdout, self.lines), daemon=True).start()
+        try:
+            ready = self.lines.get(timeout=PRETTIER_TIMEOUT)
+        except queue.Empty:
+            ready = ""
+        if not ready:
+            self.close(kill=True)
+            self.failed_at = time.monotonic()
+            raise RuntimeError(f"{self.spec} formatter failed to start")
+        self.version = json.loads(ready).get("version")
+
+    @staticmethod
+    def _pump(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put("")
+
+    def request(self, payload):
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self._start()
+            self.next_id += 1
+            request_id = self.next_id
+            deadline = time.monotonic() + PRETTIER_TIMEOUT
+            try:
+                self.process.stdin.write(json.dumps({**payload, "id": request_id}) + "\n")
+                self.process.stdin.flush()
+            except OSError:
+                self.close(kill=True)
+                raise RuntimeError(f"{self.spec} formatter exited")
+            while True:
+                try:
+                    line = self.lines.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self.close(kill=True)
+                    raise RuntimeError(f"{self.spec} formatter timed out after {PRETTIER_TIMEOUT:g}s")
+                if not line:
+                    self.close(kill=True)
+                    raise RuntimeError(f"{self.spec} formatter exited")
+                response = json.loads(line)
+                # Anything else is a stray reply to an earlier request
+                if response.get("id") == request_id:
+                    break
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    def close(self, kill=False):
+        if self.process is not None:
+            try:
+                if kill:
+                    self.process.kill()
+                else:
+                    self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+            self.process = None
+
+
+_daemons = {}
+_lock = threading.Lock()
+
+
+def get_daemon(spec):
+    with _lock:
+        if spec not in _daemons:
+            _daemons[spec] = PrettierDaemon(spec)
+        return _daemons[spec]
+
+
+def format_files(spec, files):
+    """Format ``files`` in place; returns one result dict per file."""
+    files = [str(file) for file in files]
+    try:
+        return get_daemon(spec).request({"files": files})["results"]
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"Prettier daemon unavailable ({e}), falling back to npx")
+    subprocess.run([NPX, spec, "--write", *files], check=True, timeout=PRETTIER_TIMEOUT)
+    return [{"file": file} for file in files]
+
+
+def format_text(spec, text, filepath):
+    """Return ``text`` formatted as if it were the file at ``filepath``."""
+    try:
+        return get_daemon(spec).request({"text": text, "filepath": str(filepath)})["output"]
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"Prettier daemon unavailable ({e}), falling back to npx")
+    return subprocess.run(
+        [NPX, spec, "--stdin-filepath", str(filepath)], input=text, capture_output=True, text=True, check=True,
+        timeout=PRETTIER_TIMEOUT,
+    ).stdout
+
+
+def shutdown():
+    with _lock:
+        for daemon in _daemons.values():
+            daemon.close()
+        _daemons.clear()
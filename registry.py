@@ -0,0 +1,622 @@
+"""Task registry: tool schemas, argument validation and lazily imported handlers.
+
+``function_definitions_llm`` is the single source for the ``tools`` payload sent
+to the LLM. Each schema is compiled into a validator once at import so bad
+arguments are rejected before any task work starts.
+"""
+import asyncio
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from utils import mark_worker
+
+TASK_THREAD_WORKERS = int(os.getenv("TASK_THREAD_WORKERS", "8"))
+TASK_PROCESS_WORKERS = int(os.getenv("TASK_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+TASK_TIMEOUT = float(os.getenv("TASK_TIMEOUT", "120"))
+# fork is unsafe from the threaded server process; forkserver where available
+TASK_START_METHOD = os.getenv(
+    "TASK_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class ValidationError(ValueError):
+    pass
+
+
+function_definitions_llm = [
+    {
+        "name": "A1",
+        "description": "Run a Python script from a given URL, passing an email as the argument.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                # "filename": {"type": "string", "pattern": r"https?://.*\.py"},
+                # "targetfile": {"type": "string", "pattern": r"./(.\.py)"},
+                "email": {"type": "string", "pattern": r"[\w\.-]+@[\w\.-]+\.\w+"}
+            },
+            "required": ["email"]
+        }
+    },
+    {
+        "name": "A2",
+        "description": "Format a markdown file using a specified version of Prettier.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "prettier_version": {"type": "string", "pattern": r"^prettier@\d+\.\d+\.\d+$"},
+                "filename": {"type": "string", "pattern": r"\.md$"},
+                "filenames": {
+                    "type": "array",
+                    "items": {"type": "string", "pattern": r"\.md$"},
+                    "description": "Several markdown files to format in one call, instead of filename."
+                }
+            },
+            "required": ["prettier_version"]
+        }
+    },
+    {
+        "name": "A3",
+        "description": "Count the number of occurrences of a specific weekday in a date file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {"type": "string", "pattern": r"\.txt$"},
+                "targetfile": {"type": "string", "pattern": r"\.txt$"},
+                "weekday": {
+                    "type": ["integer", "string"],
+                    "minimum": 0,
+                    "maximum": 6,
+                    "pattern": r"^(?i:monday|tuesday|wednesday|thursday|friday|saturday|sunday)s?$",
+                    "description": "Day of the week, Monday=0 ... Sunday=6, or its name such as \"Wednesday\"."
+                }
+            },
+            "required": ["filename", "targetfile", "weekday"]
+        }
+    },
+    {
+        "name": "A4",
+        "description": "Sort a JSON contacts file and save the sorted version to a target file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {
+                    "type": "string",
+                    "pattern": r"\.json$",
+                },
+                "targetfile": {
+                    "type": "string",
+                    "pattern": r"\.json$",
+                },
+                "sort_keys": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "minItems": 1,
+                    "default": ["last_name", "first_name"],
+                    "description": "Fields to sort by, in order of priority."
+                },
+                "memory_mb": {
+                    "type": "number",
+                    "minimum": 1,
+                    "description": "Estimated in-memory size, in MB, of the parsed records held before a sorted run is spilled to disk."
+                },
+                "locale_name": {
+                    "type": "string",
+                    "description": "Collate with this locale; an empty string uses the system locale."
+                },
+                "compact": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Write compact JSON instead of indenting it."
+                }
+            },
+            "required": ["filename", "targetfile"]
+        }
+    },
+    {
+        "name": "A5",
+        "description": "Retrieve the most recent log files from a directory and save their content to an output file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "log_dir_path": {
+                    "type": "string",
+                    "pattern": r".*/logs",
+                    "default": "/data/logs"
+                },
+                "output_file_path": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/logs-recent.txt"
+                },
+                "num_files": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "default": 10
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Also look in subdirectories."
+                },
+                "compressed": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Include gzip-compressed .log.gz files."
+                }
+            },
+            "required": ["log_dir_path", "output_file_path", "num_files"]
+        }
+    },
+    {
+        "name": "A6",
+        "description": "Generate an index of documents from a directory and save it as a JSON file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "doc_dir_path": {
+                    "type": "string",
+                    "pattern": r".*/docs",
+                    "default": "/data/docs"
+                },
+                "output_file_path": {
+                    "type": "string",
+                    "pattern": r"\.json$",
+                    "default": "/data/docs/index.json"
+                }
+            },
+            "required": ["doc_dir_path", "output_file_path"]
+        }
+    },
+    {
+        "name": "A7",
+        "description": "Extract the sender's email address from a text file and save it to an output file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/email.txt"
+                },
+                "output_file": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/email-sender.txt"
+                }
+            },
+            "required": ["filename", "output_file"]
+        }
+    },
+    {
+        "name": "A8",
+        "description": "Generate an image representation of credit card details from a text file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/credit-card.txt"
+                },
+                "image_path": {
+                    "type": "string",
+                    "pattern": r"\.png$",
+                    "default": "/data/credit-card.png"
+                }
+            },
+            "required": ["filename", "image_path"]
+        }
+    },
+    {
+        "name": "A9",
+        "description": "Find similar comments from a text file and save them to an output file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/comments.txt"
+                },
+                "output_filename": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/comments-similar.txt"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "default": 1,
+                    "description": "Number of most similar pairs to write."
+                },
+                "mode": {
+                    "type": "string",
+                    "pattern": r"^(auto|exact|lsh)$",
+                    "default": "auto",
+                    "description": "exact, lsh (approximate, for very large files) or auto."
+                },
+                "tables": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "default": 8,
+                    "description": "LSH hash tables; more raise recall and cost."
+                },
+                "bits": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 62,
+                    "default": 12,
+                    "description": "LSH bits per table; more make smaller buckets, cutting cost and recall."
+                }
+            },
+            "required": ["filename", "output_filename"]
+        }
+    },
+    {
+        "name": "A10",
+        "description": "Identify high-value (gold) ticket sales from a database and save them to a text file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filename": {
+                    "type": "string",
+                    "pattern": r"\.db$",
+                    "default": "/data/ticket-sales.db"
+                },
+                "output_filename": {
+                    "type": "string",
+                    "pattern": r"\.txt$",
+                    "default": "/data/ticket-sales-gold.txt"
+                },
+                "query": {
+                    "type": "string",
+                    "pattern": r"^\s*(SELECT|select|Select)\b",
+                    "default": "SELECT SUM(units * price) FROM tickets WHERE type = 'Gold'"
+                }
+            },
+            "required": ["filename", "output_filename", "query"]
+        }
+    },
+    {
+        "name": "B12",
+        "description": "Check if filepath starts with /data",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "pattern": r"^/data/.*",
+                    # "description": "Filepath must start with /data to ensure secure access."
+                }
+            },
+            "required": ["filepath"]
+        }
+    },
+    {
+        "name": "B3",
+        "description": "Download content from a URL and save it to the specified path.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "pattern": r"https?://.*",
+                    "description": "URL to download content from."
+                },
+                "save_path": {
+                    "type": "string",
+                    "pattern": r"./.",
+                    "description": "Path to save the downloaded content."
+                }
+            },
+            "required": ["url", "save_path"]
+        }
+    },
+    {
+        "name": "B5",
+        "description": "Execute a SQL query on a specified database file and save the result to an output file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "db_path": {
+                    "type": "string",
+                    "pattern": r"\.(db|duckdb)$",
+                    "description": "Path to the SQLite database file."
+                },
+                "query": {
+                    "type": "string",
+                    "description": "SQL query to be executed on the database."
+                },
+                "output_filename": {
+                    "type": "string",
+                    "pattern": r"\.(txt|csv|json|jsonl|ndjson|parquet)$",
+                    "description": "Path to the file where the query result will be saved. The extension picks the format."
+                },
+                "params": {
+                    "type": "array",
+                    "description": "Values for ? placeholders in the query."
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "Maximum number of rows to export."
+                }
+            },
+            "required": ["db_path", "query", "output_filename"]
+        }
+    },
+    {
+        "name": "B6",
+        "description": "Fetch content from a URL and save it to the specified output file.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "pattern": r"https?://.*",
+                    "description": "URL to fetch content from."
+                },
+                "output_filename": {
+                    "type": "string",
+                    "pattern": r"./.",
+                    "description": "Path to the file where the content will be saved, or a directory when fetching several URLs."
+                },
+                "urls": {
+                    "type": "array",
+                    "items": {"type": "string", "pattern": r"https?://.*"},
+                    "description": "Several URLs to fetch concurrently."
+                },
+                "url_file": {
+                    "type": "string",
+                    "pattern": r"^/data/.*",
+                    "description": "File with one URL per line to fetch concurrently."
+                },
+                "concurrency": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "Maximum number of requests in flight."
+                },
+                "host_rate": {
+                    "type": "number",
+                    "minimum": 0.01,
+                    "description": "Maximum requests per second to any one host."
+                }
+            },
+            "required": ["output_filename"]
+        }
+    },
+    {
+        "name": "B7",
+        "description": "Process an image, or every image in a directory or glob, by optionally resizing it and saving the result to an output path.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "image_path": {
+                    "type": "string",
+                    "pattern": r"\.(jpg|jpeg|png|gif|bmp|JPG|JPEG|PNG|GIF|BMP)$|[*?[]|/[^/.]*/?$",
+                    "description": "Path to the input image file, or a directory or glob of images."
+                },
+                "output_path": {
+                    "type": "string",
+                    "pattern": r"./.",
+                    "description": "Path to save the processed image, or a directory for a batch."
+                },
+                "resize": {
+                    "type": "array",
+                    "items": {
+                        "type": "integer",
+                        "minimum": 1
+                    },
+                    "minItems": 2,
+                    "maxItems": 2,
+                    "description": "Optional. Resize dimensions as [width, height]."
+                },
+                "mode": {
+                    "type": "string",
+                    "pattern": r"^(resize|thumbnail|fit)$",
+                    "description": "resize to exactly [width, height], thumbnail to fit within it keeping the aspect ratio, or fit to crop and fill it."
+                }
+            },
+            "required": ["image_path", "output_path"]
+        }
+    },
+    {
+        "name": "B9",
+        "description": "Convert a Markdown file, or every Markdown file under a directory, to HTML and save the result to the specified output path.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "md_path": {
+                    "type": "string",
+                    "pattern": r"\.md$|/[^/.]*/?$",
+                    "description": "Path to the Markdown file to be converted, or a directory of Markdown files."
+                },
+                "output_path": {
+                    "type": "string",
+                    "pattern": r"./.",
+                    "description": "Path where the converted file will be saved, or the output directory for a directory."
+                }
+            },
+            "required": ["md_path", "output_path"]
+        }
+    }
+
+]
+
+# name -> handler ("module:function"), where it runs, its timeout in seconds and
+# the arguments the handler expects as Path objects.
+# kind: "async" handlers are awaited on the event loop, "io" ones run on the
+# thread pool and "cpu" ones on the process pool.
+TASKS = {
+    "A1": {"handler": "tasksA:A1", "kind": "io", "timeout": 300, "paths": ()},
+    "A2": {"handler": "tasksA:A2", "kind": "io", "timeout": 120, "paths": ()},
+    "A3": {"handler": "tasksA:A3", "kind": "cpu", "timeout": None, "paths": ("filename", "targetfile")},
+    "A4": {"handler": "tasksA:A4", "kind": "cpu", "timeout": None, "paths": ("filename", "targetfile")},
+    "A5": {"handler": "tasksA:A5", "kind": "io", "timeout": None, "paths": ("log_dir_path", "output_file_path")},
+    "A6": {"handler": "tasksA:A6", "kind": "io", "timeout": None, "paths": ("doc_dir_path", "output_file_path")},
+    "A7": {"handler": "tasksA:A7", "kind": "io", "timeout": None, "paths": ("filename", "output_file")},
+    "A8": {"handler": "tasksA:A8", "kind": "async", "timeout": None, "paths": ("filename", "image_path")},
+    "A9": {"handler": "tasksA:A9", "kind": "async", "timeout": 300, "paths": ("filename", "output_filename")},
+    "A10": {"handler": "tasksA:A10", "kind": "io", "timeout": None, "paths": ("filename", "output_filename")},
+    "B12": {"handler": "tasksB:B12", "kind": "io", "timeout": None, "paths": ()},
+    "B3": {"handler": "tasksB:B3", "kind": "async", "timeout": None, "paths": ()},
+    "B5": {"handler": "tasksB:B5", "kind": "io", "timeout": None, "paths": ()},
+    "B6": {"handler": "tasksB:B6", "kind": "async", "timeout": None, "paths": ()},
+    # B7/B9 fan directories out over their own process pools, which they can't start inside a "cpu" worker
+    "B7": {"handler": "tasksB:B7", "kind": "io", "timeout": None, "paths": ()},
+    "B9": {"handler": "tasksB:B9", "kind": "io", "timeout": None, "paths": ()},
+}
+
+TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def compile_schema(schema, where="arguments"):
+    """Build a validator for the subset of JSON Schema used by the tool definitions."""
+    checks = []
+    expected = schema.get("type")
+    if expected:
+        # "type" may also be a list of alternatives, e.g. ["integer", "string"]
+        names = expected if isinstance(expected, list) else [expected]
+        py_type = tuple(t for name in names for t in (TYPES[name] if isinstance(TYPES[name], tuple) else (TYPES[name],)))
+
+        def check_type(value, where):
+            # bool is an int subclass but never a valid integer/number argument
+            if not isinstance(value, py_type) or (isinstance(value, bool) and "boolean" not in names):
+                raise ValidationError(f"{where} must be of type {' or '.join(names)}")
+
+        checks.append(check_type)
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, where):
+            if isinstance(value, str) and not pattern.search(value):
+                raise ValidationError(f"{where} does not match {pattern.pattern!r}")
+
+        checks.append(check_pattern)
+    if "minimum" in schema or "maximum" in schema:
+        low, high = schema.get("minimum"), schema.get("maximum")
+
+        def check_range(value, where):
+            if not isinstance(value, (int, float)):
+                return
+            if low is not None and value < low:
+                raise ValidationError(f"{where} must be >= {low}")
+            if high is not None and value > high:
+                raise ValidationError(f"{where} must be <= {high}")
+
+        checks.append(check_range)
+    if expected == "array":
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+        item_check = compile_schema(schema["items"]) if "items" in schema else None
+
+        def check_items(value, where):
+            if min_items is not None and len(value) < min_items:
+                raise ValidationError(f"{where} needs at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise ValidationError(f"{where} takes at most {max_items} items")
+            if item_check:
+                for i, item in enumerate(value):
+                    item_check(item, f"{where}[{i}]")
+
+        checks.append(check_items)
+    if expected == "object":
+        properties = {name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+        required = [name for name in schema.get("required", []) if name in properties]
+
+        def check_properties(value, where):
+            for name in required:
+                if name not in value:
+                    raise ValidationError(f"{where} is missing required field {name!r}")
+            for name, item in value.items():
+                if name not in properties:
+                    raise ValidationError(f"{where} has unexpected field {name!r}")
+                properties[name](item, f"{name}")
+
+        checks.append(check_properties)
+
+    def validate(value, where=where):
+        for check in checks:
+            check(value, where)
+
+    return validate
+
+
+validators = {f["name"]: compile_schema(f["parameters"]) for f in function_definitions_llm}
+tools = [{"type": "function", "function": f} for f in function_definitions_llm]
+_handlers = {}
+
+
+def get_handler(name):
+    """Import the task's module on first use and return its function."""
+    if name not in _handlers:
+        module, function = TASKS[name]["handler"].split(":")
+        _handlers[name] = getattr(importlib.import_module(module), function)
+    return _handlers[name]
+
+
+def prepare(name, arguments):
+    """Parse and validate a tool call's arguments, returning handler kwargs."""
+    if name not in TASKS:
+        raise ValidationError(f"Unknown task {name!r}")
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"arguments are not valid JSON: {e}") from None
+    validators[name](arguments)
+    return {key: Path(value) if key in TASKS[name]["paths"] else value for key, value in arguments.items()}
+
+
+_pools = {}
+
+
+def get_pool(kind):
+    if kind not in _pools:
+        if kind == "cpu":
+            _pools[kind] = ProcessPoolExecutor(
+                max_workers=TASK_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context(TASK_START_METHOD),
+                initializer=mark_worker,
+            )
+        else:
+            _pools[kind] = ThreadPoolExecutor(max_workers=TASK_THREAD_WORKERS, thread_name_prefix="task")
+    return _pools[kind]
+
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
+
+
+async def execute(name, kwargs):
+    """Run a task on the event loop, thread pool or process pool as its spec declares.
+
+    On timeout the caller gets a TimeoutError; work already handed to a pool
+    cannot be interrupted and finishes in the background.
+    """
+    spec = TASKS[name]
+    handler = get_handler(name)
+    timeout = spec["timeout"] if spec["timeout"] is not None else TASK_TIMEOUT
+    if spec["kind"] == "async":
+        work = handler(**kwargs)
+    else:
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(get_pool(spec["kind"]), functools.partial(handler, **kwargs))
+    try:
+        result = await asyncio.wait_for(work, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{name} did not finish within {timeout:g}s") from None
+    return result
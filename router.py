@@ -0,0 +1,255 @@
+"""Deterministic fast-path classifier for the common task phrasings.
+
+Each rule pairs a few compiled keyword patterns with an extractor that pulls
+the tool arguments out of the task text. An extractor returns ``None`` when
+the text asks for more than its arguments can say (a second file or weekday,
+an unparsed size, other sort fields), since keywords alone would still match.
+``route`` returns a tool call shaped like the LLM's (``name`` + JSON
+``arguments``) plus a confidence score, or ``None`` when no rule is sure
+enough and the caller should ask the LLM.
+"""
+import json
+import os
+import re
+
+MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
+
+PATH_RE = re.compile(r"/data(?:/[\w.\-]+)*/?")
+URL_RE = re.compile(r"https?://[^\s`'\"<>]+")
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PRETTIER_RE = re.compile(r"prettier@\d+\.\d+\.\d+")
+NUMBER_RE = re.compile(r"\b(\d+)\s+(?:most\s+)?recent\b", re.I)
+SIZE_RE = re.compile(r"\b(\d+)\s*[x×]\s*(\d+)\b")
+# Any hint of a resize; if SIZE_RE can't read the size, the LLM has to
+RESIZE_RE = re.compile(r"\b(?:resiz|scal|shrink|thumbnail)\w*|\d\s*(?:%|percent\b|px\b|pixels?\b)", re.I)
+# Only delimited SQL: without a closing delimiter there's no telling where the query ends
+SQL_RE = re.compile(r"`\s*((?:SELECT|WITH)\b[^`]*)`|\"\s*((?:SELECT|WITH)\b[^\"]*)\"|'\s*((?:SELECT|WITH)\b[^']*)'", re.I)
+# Negated or excepted instructions change the meaning in ways keywords can't see
+NEGATION_RE = re.compile(r"\b(?:don'?t|do not|does not|doesn'?t|never|not|except|excluding|instead of|rather than)\b", re.I)
+TICKET_TYPE_RE = re.compile(r"\b(Gold|Silver|Bronze)\b", re.I)
+TOTAL_SALES_RE = re.compile(r"\btotal sales\b", re.I)
+# A10 only answers SUM(units * price); any other aggregate goes to the LLM
+OTHER_AGGREGATE_RE = re.compile(
+    r"\b(?:average|mean|median|count|how many|number of|units sold|max\w*|min\w*|highest|lowest)\b", re.I
+)
+# "by <fields>" up to the next clause or path
+SORT_BY_RE = re.compile(r"\bby\s+(.+?)(?=,?\s*(?:and\s+)?(?:write|save|store|output)\b|\s*(?:in|into|to)?\s*/data|[.;](?:\s|$)|$)", re.I)
+SORT_FIELDS = {"last_name", "first_name"}
+SORT_FILLER = {"then", "and", "the", "their", "field", "fields", "key", "keys", "only", "ascending"}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+WEEKDAY_RE = re.compile(r"\b(" + "|".join(WEEKDAYS) + r")s?\b", re.I)
+
+stats = {"routed": 0, "fallbacks": 0}
+
+
+def paths(text, *extensions):
+    """Distinct /data paths in order of first mention."""
+    found = [p.rstrip(".") for p in PATH_RE.findall(text)]
+    if extensions:
+        found = [p for p in found if p.lower().endswith(extensions)]
+    return list(dict.fromkeys(found))
+
+
+def directory(text, name):
+    for p in paths(text):
+        if p.rstrip("/").endswith("/" + name):
+            return p.rstrip("/")
+    return None
+
+
+def in_out(found):
+    """Split the mentioned paths into (input, output), in order of mention.
+
+    Any other count means files the extractor can't place, so it's ``None``.
+    """
+    if len(found) != 2:
+        return None
+    return found[0], found[1]
+
+
+def extract_a1(text):
+    emails = [e for e in EMAIL_RE.findall(text) if not e.endswith(".py")]
+    return {"email": emails[-1]} if emails else None
+
+
+def extract_a2(text):
+    version = PRETTIER_RE.search(text)
+    md = paths(text, ".md")
+    if not version or len(md) != 1:
+        return None
+    return {"prettier_version": version.group(0), "filename": md[0]}
+
+
+def extract_a3(text):
+    weekdays = {day.lower() for day in WEEKDAY_RE.findall(text)}
+    files = in_out(paths(text, ".txt"))
+    if len(weekdays) != 1 or not files:
+        return None
+    return {"filename": files[0], "targetfile": files[1], "weekday": WEEKDAYS.index(weekdays.pop())}
+
+
+def extract_a4(text):
+    files = in_out(paths(text, ".json"))
+    spec = SORT_BY_RE.search(text)
+    if not files or not spec:
+        return None
+    fields = [word for word in re.findall(r"\w+", spec.group(1)) if word.lower() not in SORT_FILLER]
+    if not fields or not SORT_FIELDS.issuperset(fields) or len(set(fields)) != len(fields):
+        return None
+    return {"filename": files[0], "targetfile": files[1], "sort_keys": fields}
+
+
+def extract_a5(text):
+    log_dir = directory(text, "logs")
+    output = paths(text, ".txt")
+    if not log_dir or not output:
+        return None
+    count = NUMBER_RE.search(text)
+    return {"log_dir_path": log_dir, "output_file_path": output[-1], "num_files": int(count.group(1)) if count else 10}
+
+
+def extract_a6(text):
+    doc_dir = directory(text, "docs")
+    output = paths(text, ".json")
+    if not doc_dir or not output:
+        return None
+    return {"doc_dir_path": doc_dir, "output_file_path": output[-1]}
+
+
+def extract_a7(text):
+    files = in_out(paths(text, ".txt"))
+    return {"filename": files[0], "output_file": files[1]} if files else None
+
+
+def extract_a8(text):
+    image = paths(text, ".png", ".jpg", ".jpeg")
+    output = paths(text, ".txt")
+    if not image or not output:
+        return None
+    return {"filename": output[-1], "image_path": image[0]}
+
+
+def extract_a9(text):
+    files = in_out(paths(text, ".txt"))
+    return {"filename": files[0], "output_filename": files[1]} if files else None
+
+
+def extract_a10(text):
+    db = paths(text, ".db")
+    output = paths(text, ".txt")
+    ticket_types = {found.capitalize() for found in TICKET_TYPE_RE.findall(text)}
+    if len(db) != 1 or len(output) != 1 or len(ticket_types) != 1:
+        return None
+    if not TOTAL_SALES_RE.search(text) or OTHER_AGGREGATE_RE.search(text):
+        return None
+    ticket_type = ticket_types.pop()
+    return {
+        "filename": db[0],
+        "output_filename": output[0],
+        "query": f"SELECT SUM(units * price) FROM tickets WHERE type = '{ticket_type}'",
+    }
+
+
+def extract_b3(text):
+    url = URL_RE.search(text)
+    save = paths(text)
+    if not url or not save:
+        return None
+    return {"url": url.group(0).rstrip(".,)"), "save_path": save[-1]}
+
+
+def extract_b5(text):
+    db = paths(text, ".db")
+    output = paths(text, ".txt")
+    query = SQL_RE.search(text)
+    if not db or not output or not query:
+        return None
+    sql = next(group for group in query.groups() if group is not None)
+    return {"db_path": db[0], "query": sql.strip().rstrip(";").strip(), "output_filename": output[-1]}
+
+
+def extract_b6(text):
+    url = URL_RE.search(text)
+    output = paths(text)
+    if not url or not output:
+        return None
+    return {"url": url.group(0).rstrip(".,)"), "output_filename": output[-1]}
+
+
+def extract_b7(text):
+    files = in_out(paths(text, ".jpg", ".jpeg", ".png", ".gif", ".bmp"))
+    if not files:
+        return None
+    arguments = {"image_path": files[0], "output_path": files[1]}
+    sizes = SIZE_RE.findall(text)
+    if len(sizes) > 1 or (not sizes and RESIZE_RE.search(text)):
+        return None
+    if sizes:
+        arguments["resize"] = [int(sizes[0][0]), int(sizes[0][1])]
+        if re.search(r"\bthumbnail", text, re.I):
+            arguments["mode"] = "thumbnail"
+    return arguments
+
+
+def extract_b9(text):
+    md = paths(text, ".md")
+    output = paths(text, ".html", ".htm")
+    if len(md) != 1 or len(output) != 1:
+        return None
+    return {"md_path": md[0], "output_path": output[0]}
+
+
+def keywords(*patterns):
+    return [re.compile(p, re.I) for p in patterns]
+
+
+# name -> (keyword patterns, argument extractor)
+RULES = {
+    "A1": (keywords(r"datagen", r"\buv\b|\brun\b"), extract_a1),
+    "A2": (keywords(r"\bprettier\b", r"\bformat"), extract_a2),
+    "A3": (keywords(r"\bcount\b|\bhow many\b", WEEKDAY_RE.pattern, r"\bdates?\b"), extract_a3),
+    "A4": (keywords(r"\bsort", r"\bcontacts\b", r"last_name|first_name|\bname\b"), extract_a4),
+    "A5": (keywords(r"\.log\b|\blogs?\b", r"\brecent\b", r"\bfirst line\b"), extract_a5),
+    "A6": (keywords(r"markdown|\.md\b", r"\bindex\b", r"\bH1\b|\btitle"), extract_a6),
+    "A7": (keywords(r"\bemail\b", r"\bsender"), extract_a7),
+    "A8": (keywords(r"credit[ _-]?card", r"\bcard number\b|\bnumber\b"), extract_a8),
+    "A9": (keywords(r"\bcomments?\b", r"\bsimilar", r"\bembedding"), extract_a9),
+    "A10": (keywords(r"\btickets?\b", TOTAL_SALES_RE.pattern, r"\bgold\b|\bsilver\b|\bbronze\b"), extract_a10),
+    "B3": (keywords(r"\bdownload\b|\bfetch\b.*\bapi\b", r"\bsave\b|\bwrite\b"), extract_b3),
+    "B5": (keywords(r"\bsql\b|\bquery\b", r"\.db\b|sqlite|duckdb|database"), extract_b5),
+    "B6": (keywords(r"\bscrap", r"\bwebsite\b|\bweb\b|\bpage\b|https?://"), extract_b6),
+    "B7": (keywords(r"\bimage\b|\.(?:png|jpe?g|gif|bmp)\b", r"\bresize\b|\bcompress\b|\bthumbnail\b"), extract_b7),
+    "B9": (keywords(r"markdown|\.md\b", r"\bhtml\b"), extract_b9),
+}
+
+
+def route(task: str, known=None, min_confidence=MIN_CONFIDENCE):
+    """Return ``{"name", "arguments", "confidence"}`` or ``None`` to fall back to the LLM."""
+    if NEGATION_RE.search(task):
+        stats["fallbacks"] += 1
+        return None
+    candidates = []
+    for name, (patterns, extract) in RULES.items():
+        if known is not None and name not in known:
+            continue
+        score = sum(1 for p in patterns if p.search(task)) / len(patterns)
+        if score == 0:
+            continue
+        arguments = extract(task)
+        if arguments is None:
+            continue
+        candidates.append((score, name, arguments))
+
+    if not candidates:
+        stats["fallbacks"] += 1
+        return None
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    confidence, name, arguments = candidates[0]
+    # An equally good runner-up means the text is ambiguous
+    if len(candidates) > 1 and candidates[1][0] >= confidence:
+        confidence /= 2
+    if confidence < min_confidence:
+        stats["fallbacks"] += 1
+        return None
+    stats["routed"] += 1
+    return {"name": name, "arguments": json.dumps(arguments), "confidence": confidence}
@@ -0,0 +1,104 @@
+"""Concurrent multi-URL fetching for B6.
+
+URLs are fetched on the shared client with a global concurrency cap and a
+token bucket per host. Failed fetches (transport errors, 429 and 5xx) are
+retried with full-jitter exponential backoff, and each URL is written to its
+own file through ``downloads.download``.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+from urllib.parse import urlsplit
+import httpx
+from downloads import download
+from utils import percentile
+
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "16"))
+SCRAPE_HOST_RATE = float(os.getenv("SCRAPE_HOST_RATE", "5"))
+SCRAPE_HOST_BURST = int(os.getenv("SCRAPE_HOST_BURST", "5"))
+SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "3"))
+SCRAPE_BACKOFF = float(os.getenv("SCRAPE_BACKOFF", "0.5"))
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def read_url_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def output_name(url):
+    """A stable, filesystem-safe file name for a URL."""
+    parts = urlsplit(url)
+    extension = os.path.splitext(parts.path)[1] or ".html"
+    slug = re.sub(r"[^\w.-]+", "_", parts.netloc + parts.path.rsplit(".", 1)[0]).strip("_")[:80]
+    return f"{slug}-{hashlib.sha1(url.encode()).hexdigest()[:8]}{extension}"
+
+
+def _retryable(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def fetch_all(urls, output_dir, concurrency=SCRAPE_CONCURRENCY, host_rate=SCRAPE_HOST_RATE,
+                    host_burst=SCRAPE_HOST_BURST, retries=SCRAPE_RETRIES, backoff=SCRAPE_BACKOFF, client=None):
+    """Fetch every URL into ``output_dir`` and return a summary of the run."""
+    os.makedirs(output_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    buckets = {}
+    results = []
+
+    async def fetch(url):
+        bucket = buckets.setdefault(urlsplit(url).netloc, TokenBucket(host_rate, host_burst))
+        path = os.path.join(output_dir, output_name(url))
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            try:
+                async with semaphore:
+                    outcome = await download(url, path, client=client, retries=0)
+            except Exception as e:
+                if attempt < retries and _retryable(e):
+                    await asyncio.sleep(random.uniform(0, backoff * 2**attempt))
+                    continue
+                results.append({"url": url, "error": str(e) or type(e).__name__, "attempts": attempt + 1})
+                return
+            results.append({"url": url, **outcome, "seconds": time.perf_counter() - start, "attempts": attempt + 1})
+            return
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in dict.fromkeys(urls)))
+    latencies = [r["seconds"] for r in results if "seconds" in r]
+    return {
+        "urls": len(results),
+        "succeeded": len(latencies),
+        "failed": [r for r in results if "error" in r],
+        "bytes": sum(r.get("bytes", 0) for r in results),
+        "seconds": time.perf_counter() - started,
+        "latency": {f"p{q}": percentile(latencies, q) for q in (50, 95, 99)},
+        "files": {r["url"]: r["path"] for r in results if "path" in r},
+    }
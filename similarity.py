@@ -0,0 +1,107 @@
+"""Most-similar-pair search over embedding matrices.
+
+``exact`` normalizes once and scans the upper triangle of the cosine
+similarity matrix in row blocks sized to stay under a memory cap. ``lsh``
+buckets rows with random-hyperplane signatures and only scores pairs that
+share a bucket in at least one table: more tables raise recall, more bits
+per table shrink buckets and cost.
+"""
+import heapq
+import os
+import numpy as np
+
+SIMILARITY_MEMORY_MB = float(os.getenv("SIMILARITY_MEMORY_MB", "256"))
+# Inputs larger than this use LSH when mode="auto"
+SIMILARITY_EXACT_LIMIT = int(os.getenv("SIMILARITY_EXACT_LIMIT", "50000"))
+# Per score in a block: the float32 itself plus the int64 index argpartition builds
+BYTES_PER_SCORE = 4 + 8
+
+
+def normalize(embeddings):
+    unit = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(unit, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return unit / norms
+
+
+def _push(heap, k, scores, rows, cols):
+    """Keep the k best (score, i, j) triples seen so far in a min-heap."""
+    for score, i, j in zip(scores.tolist(), rows.tolist(), cols.tolist()):
+        if len(heap) < k:
+            heapq.heappush(heap, (score, i, j))
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, (score, i, j))
+
+
+def _mask_lower(similarity):
+    """Set the diagonal and everything left of it to -inf, in place.
+
+    Row by row, because np.tril_indices would allocate index arrays larger
+    than the block itself.
+    """
+    for row in range(len(similarity)):
+        similarity[row, : row + 1] = -np.inf
+
+
+def _top_k(similarity, k):
+    flat = similarity.ravel()
+    k = min(k, flat.size)
+    best = np.argpartition(flat, -k)[-k:]
+    best = best[np.isfinite(flat[best])]
+    return flat[best], *np.unravel_index(best, similarity.shape)
+
+
+def exact_pairs(unit, k=1, memory_mb=SIMILARITY_MEMORY_MB):
+    n = len(unit)
+    block = max(1, int(memory_mb * 2**20 // (BYTES_PER_SCORE * max(n, 1))))
+    heap = []
+    for start in range(0, n - 1, block):
+        stop = min(start + block, n)
+        # Only columns from `start` on: earlier ones were covered by previous blocks
+        similarity = unit[start:stop] @ unit[start:].T
+        _mask_lower(similarity)
+        scores, rows, cols = _top_k(similarity, k)
+        _push(heap, k, scores, rows + start, cols + start)
+    return heap
+
+
+def lsh_pairs(unit, k=1, tables=8, bits=12, max_bucket=2048, seed=0):
+    n, dim = unit.shape
+    rng = np.random.default_rng(seed)
+    weights = 1 << np.arange(bits, dtype=np.int64)
+    best = {}
+    for _ in range(tables):
+        planes = rng.standard_normal((dim, bits)).astype(np.float32)
+        signatures = ((unit @ planes) > 0) @ weights
+        order = np.argsort(signatures, kind="stable")
+        bounds = np.flatnonzero(np.diff(signatures[order])) + 1
+        for bucket in np.split(order, bounds):
+            # Oversized buckets are compared in slices to bound the cost
+            for s in range(0, len(bucket), max_bucket):
+                members = np.sort(bucket[s : s + max_bucket])
+                if len(members) < 2:
+                    continue
+                similarity = unit[members] @ unit[members].T
+                _mask_lower(similarity)
+                scores, rows, cols = _top_k(similarity, k)
+                for score, i, j in zip(scores.tolist(), members[rows].tolist(), members[cols].tolist()):
+                    best[(i, j)] = score
+    return heapq.nlargest(k, ((score, i, j) for (i, j), score in best.items()))
+
+
+def most_similar_pairs(embeddings, k=1, mode="auto", memory_mb=SIMILARITY_MEMORY_MB, tables=8, bits=12):
+    """Return up to k ``(similarity, i, j)`` tuples with i < j, most similar first.
+
+    mode is "exact", "lsh" (approximate) or "auto", which switches to LSH above
+    SIMILARITY_EXACT_LIMIT rows. ``tables`` and ``bits`` tune LSH recall.
+    """
+    unit = normalize(embeddings)
+    if len(unit) < 2:
+        return []
+    if mode == "auto":
+        mode = "lsh" if len(unit) > SIMILARITY_EXACT_LIMIT else "exact"
+    if mode == "lsh":
+        pairs = lsh_pairs(unit, k, tables=tables, bits=bits)
+    else:
+        pairs = exact_pairs(unit, k, memory_mb=memory_mb)
+    return sorted(pairs, reverse=True)
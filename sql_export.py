@@ -0,0 +1,120 @@
+"""Streaming export of SQL query results.
+
+Rows are pulled with ``fetchmany`` and written as they arrive, in a format
+chosen by the output file's extension, so memory use does not grow with the
+result size.
+"""
+import csv
+import json
+import os
+import time
+
+SQL_FETCH_ROWS = int(os.getenv("SQL_FETCH_ROWS", "10000"))
+
+
+def _batches(cursor, limit, size):
+    remaining = limit
+    while remaining is None or remaining > 0:
+        rows = cursor.fetchmany(size if remaining is None else min(size, remaining))
+        if not rows:
+            return
+        if remaining is not None:
+            remaining -= len(rows)
+        yield rows
+
+
+def _write_repr(batches, columns, f):
+    # Same text as str(cursor.fetchall()), without materializing the list
+    f.write("[")
+    first = True
+    for rows in batches:
+        for row in rows:
+            f.write(("" if first else ", ") + repr(tuple(row)))
+            first = False
+    f.write("]")
+
+
+def _write_csv(batches, columns, f):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+
+
+def _write_jsonl(batches, columns, f):
+    for rows in batches:
+        f.writelines(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+
+
+def _write_json(batches, columns, f):
+    f.write("[")
+    first = True
+    for rows in batches:
+        for row in rows:
+            f.write(("" if first else ",\n") + json.dumps(dict(zip(columns, row)), default=str))
+            first = False
+    f.write("]")
+
+
+def _write_parquet(batches, columns, path):
+    """Write batches as Parquet under one schema unified across all of them.
+
+    A column's type is only known once a batch has a non-NULL value for it (and
+    an integer column may turn out to hold floats later), so each batch is first
+    spooled to its own fragment. The fragments are then cast to the promoted
+    schema and copied into the output one at a time.
+    """
+    import tempfile
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path)), prefix=".parquet-") as spool:
+        fragments, schemas = [], []
+        for rows in batches:
+            table = pa.Table.from_pylist([dict(zip(columns, row)) for row in rows])
+            fragments.append(os.path.join(spool, f"{len(fragments)}.parquet"))
+            pq.write_table(table, fragments[-1])
+            schemas.append(table.schema)
+        if not fragments:
+            pq.write_table(pa.table({name: [] for name in columns}), path)
+            return
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+        with pq.ParquetWriter(path, schema) as writer:
+            for fragment in fragments:
+                writer.write_table(pq.read_table(fragment).cast(schema))
+                os.remove(fragment)
+
+
+TEXT_WRITERS = {
+    ".csv": _write_csv,
+    ".jsonl": _write_jsonl,
+    ".ndjson": _write_jsonl,
+    ".json": _write_json,
+}
+
+
+def export_query(conn, query, output_filename, params=(), limit=None, fetch_rows=SQL_FETCH_ROWS):
+    """Run ``query`` on ``conn`` and stream the rows into ``output_filename``.
+
+    Returns the number of rows written and the elapsed time.
+    """
+    start = time.perf_counter()
+    counted = [0]
+    cursor = conn.cursor()
+    cursor.execute(query, list(params))
+    columns = [column[0] for column in cursor.description or []]
+
+    def batches():
+        for rows in _batches(cursor, limit, fetch_rows):
+            counted[0] += len(rows)
+            yield rows
+
+    extension = os.path.splitext(output_filename)[1].lower()
+    if extension == ".parquet":
+        _write_parquet(batches(), columns, output_filename)
+    else:
+        writer = TEXT_WRITERS.get(extension, _write_repr)
+        with open(output_filename, "w", newline="" if extension == ".csv" else None, encoding="utf-8") as f:
+            writer(batches(), columns, f)
+    cursor.close()
+    return {"rows": counted[0], "seconds": time.perf_counter() - start, "output": output_filename}
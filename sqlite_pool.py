@@ -0,0 +1,157 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
+
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 2**20)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", str(64 * 1024)))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+# Switching a file to WAL is persistent and leaves -wal/-shm files next to it
+SQLITE_WAL = os.getenv("SQLITE_WAL", "0") == "1"
+QUERY_RE = re.compile(r"(?:SELECT|VALUES|EXPLAIN)\b", re.I)
+WRITE_RE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.I)
+
+
+def db_signature(path: str):
+    """Identify the current contents of a database, including its WAL file."""
+    st = os.stat(path)
+    try:
+        wal = os.stat(path + "-wal")
+        # Readers create an empty WAL file; only its contents matter
+        wal = (wal.st_mtime_ns, wal.st_size) if wal.st_size else None
+    except FileNotFoundError:
+        wal = None
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size, wal)
+
+
+def normalize_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+def is_read_only(sql: str) -> bool:
+    """Whether ``sql`` can run on a read-only connection; unsure means False."""
+    sql = normalize_sql(sql)
+    if re.match(r"WITH\b", sql, re.I):
+        # A CTE can front an INSERT/UPDATE/DELETE
+        return not WRITE_RE.search(sql)
+    return bool(QUERY_RE.match(sql))
+
+
+class ConnectionPool:
+    """Read-only connections to one SQLite file, reused across calls."""
+
+    def __init__(self, path: str, size=SQLITE_POOL_SIZE, wal=SQLITE_WAL):
+        self.path = path
+        st = os.stat(path)
+        self.identity = (st.st_dev, st.st_ino)
+        self.idle = queue.LifoQueue(maxsize=size)
+        if wal:
+            self._enable_wal()
+
+    def _enable_wal(self):
+        # journal_mode is persistent but can only be changed with write access
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        conn.execute(f"PRAGMA cache_size={-SQLITE_CACHE_KB}")
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        else:
+            try:
+                self.idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(path, wal=SQLITE_WAL) -> ConnectionPool:
+    """Return the pool for a database, replacing it if the file was recreated.
+
+    With ``wal`` a new pool first switches the file to WAL journaling, which
+    lets readers run alongside a writer but changes the file for good.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    with _lock:
+        pool = _pools.get(path)
+        if pool is None or pool.identity != (st.st_dev, st.st_ino):
+            if pool is not None:
+                pool.close()
+            pool = _pools[path] = ConnectionPool(path, wal=wal)
+        return pool
+
+
+class QueryCache:
+    """LRU of query results keyed by database state, normalized SQL and parameters."""
+
+    def __init__(self, size=QUERY_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def query(self, path, sql, params=()):
+        path = os.path.abspath(path)
+        # Creating the pool may switch the file to WAL, so do it before taking the signature
+        pool = get_pool(path)
+        key = (path, db_signature(path), normalize_sql(sql), tuple(params))
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self.entries[key]
+            self.stats["misses"] += 1
+        with pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        with self.lock:
+            self.entries[key] = rows
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return rows
+
+    def info(self):
+        return {**self.stats, "entries": len(self.entries), "max_entries": self.size}
+
+
+query_cache = QueryCache()
+
+
+def cached_query(path, sql, params=()):
+    return query_cache.query(os.fspath(path), sql, params)
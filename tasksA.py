@@ -1,24 +1,39 @@
 import os
 import json
-import sqlite3
+import asyncio
+import gzip
+import heapq
+import hashlib
 import subprocess
 from datetime import datetime
-from dateutil.parser import parse
 from pathlib import Path
-from scipy.spatial.distance import cosine
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import base64
 from dotenv import load_dotenv
+from http_client import aiproxy_post
+from embeddings import embed
+from similarity import most_similar_pairs
+from date_parser import WEEKDAYS, weekday_histogram, weekday_index
+from external_sort import SORT_MEMORY_MB, sort_json_array
+from sqlite_pool import cached_query
+from prettier_daemon import format_files
+from datagen_cache import materialize
+from utils import scan_files
 
 load_dotenv()
 
-AIPROXY_TOKEN = os.getenv("AIPROXY_TOKEN")
-
 # Set base directory
 BASE_DIR = Path(__file__).resolve().parent / "data"
 
 
 def A1(email="23ds2000055@ds.study.iitm.ac.in"):
+    try:
+        result = materialize(email)
+        print(f"Restored {result['files']} files for {email} into {result['root']}" + (" from cache" if result["cached"] else ""))
+        return result
+    except ImportError as e:
+        # datagen's dependencies are missing here: let uv provide them for the remote script
+        print(f"Generating in-process failed ({e}), running the remote datagen.py")
     try:
         process = subprocess.Popen(
             [
@@ -41,12 +56,17 @@ def A1(email="23ds2000055@ds.study.iitm.ac.in"):
         return None
 
 
-def A2(prettier_version="prettier@3.4.2", filename=BASE_DIR / "format.md"):
-    command = [r"C:\Program Files\nodejs\npx.cmd", prettier_version, "--write", str(filename)]
+def A2(prettier_version="prettier@3.4.2", filename=BASE_DIR / "format.md", filenames=None):
+    files = [filename] if filenames is None else list(filenames)
     try:
-        subprocess.run(command, check=True)
-        print("Prettier executed successfully.")
-    except subprocess.CalledProcessError as e:
+        results = format_files(prettier_version, files)
+        errors = [result for result in results if "error" in result]
+        for result in errors:
+            print(f"An error occurred formatting {result['file']}: {result['error']}")
+        if not errors:
+            print("Prettier executed successfully.")
+        return results
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError) as e:
         print(f"An error occurred: {e}")
 
 
@@ -56,59 +76,114 @@ def A3(filename=BASE_DIR / "dates.txt", targetfile=BASE_DIR / "dates-wednesdays.
         return
 
     try:
-        with filename.open("r") as file:
-            dates = file.readlines()
-
-        weekday_count = sum(1 for date in dates if parse(date.strip()).weekday() == weekday)
+        weekday = weekday_index(weekday)
+        weekday_count = weekday_histogram(filename)[weekday]
 
         with targetfile.open("w") as file:
             file.write(str(weekday_count))
 
-        print(f"Found {weekday_count} Wednesdays. Saved to {targetfile}")
+        print(f"Found {weekday_count} {WEEKDAYS[weekday]}s. Saved to {targetfile}")
 
     except Exception as e:
         print(f"Error processing the file: {e}")
 
 
-def A4(filename=BASE_DIR / "contacts.json", targetfile=BASE_DIR / "contacts-sorted.json"):
-    with filename.open("r") as file:
-        contacts = json.load(file)
+def A4(
+    filename=BASE_DIR / "contacts.json",
+    targetfile=BASE_DIR / "contacts-sorted.json",
+    sort_keys=("last_name", "first_name"),
+    memory_mb=SORT_MEMORY_MB,
+    locale_name=None,
+    compact=False,
+):
+    sort_json_array(filename, targetfile, sort_keys, memory_mb=memory_mb, locale_name=locale_name, compact=compact)
 
-    sorted_contacts = sorted(contacts, key=lambda x: (x["last_name"], x["first_name"]))
 
-    with targetfile.open("w") as file:
-        json.dump(sorted_contacts, file, indent=4)
+def _scan_logs(log_dir, recursive=False, compressed=False):
+    """Yield (mtime, path) for log files, using the stat cached on each scandir entry."""
+    suffixes = (".log", ".log.gz") if compressed else (".log",)
+    pending = [log_dir]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.name.endswith(suffixes) and entry.is_file():
+                    yield entry.stat().st_mtime, entry.path
 
 
-def A5(log_dir_path=BASE_DIR / "logs", output_file_path=BASE_DIR / "logs-recent.txt", num_files=10):
-    log_dir = Path(log_dir_path)
+def _first_line(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f_in:
+        return f_in.readline().strip()
 
-    log_files = sorted(log_dir.glob("*.log"), key=os.path.getmtime, reverse=True)[:num_files]
 
-    with output_file_path.open("w") as f_out:
-        for log_file in log_files:
-            with log_file.open("r") as f_in:
-                f_out.write(f_in.readline().strip() + "\n")
+def A5(log_dir_path=BASE_DIR / "logs", output_file_path=BASE_DIR / "logs-recent.txt", num_files=10, recursive=False, compressed=False):
+    newest = heapq.nlargest(num_files, _scan_logs(os.fspath(log_dir_path), recursive, compressed), key=lambda item: item[0])
 
+    with ThreadPoolExecutor(max_workers=min(16, len(newest) or 1)) as pool:
+        first_lines = list(pool.map(_first_line, [path for _, path in newest]))
 
-def A6(doc_dir_path=BASE_DIR / "docs", output_file_path=BASE_DIR / "docs/index.json"):
-    index_data = {}
-
-    for root, _, files in os.walk(doc_dir_path):
-        for file in files:
-            if file.endswith(".md"):
-                file_path = Path(root) / file
-                with file_path.open("r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.startswith("# "):
-                            title = line[2:].strip()
-                            relative_path = file_path.relative_to(doc_dir_path).as_posix()
-                            index_data[relative_path] = title
-                            break
+    with Path(output_file_path).open("w") as f_out:
+        for line in first_lines:
+            f_out.write(line + "\n")
 
+
+DOCS_MANIFEST_DIR = Path(os.getenv("DOCS_MANIFEST_DIR", Path(__file__).resolve().parent / ".cache" / "docs"))
+
+
+def _first_h1(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("# "):
+                return line[2:].strip()
+    return None
+
+
+def A6(doc_dir_path=BASE_DIR / "docs", output_file_path=BASE_DIR / "docs/index.json"):
+    doc_dir = os.path.abspath(doc_dir_path)
+    manifest_path = DOCS_MANIFEST_DIR / f"{hashlib.sha256(doc_dir.encode()).hexdigest()[:16]}.json"
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {"files": {}, "output": None}
+    previous = manifest["files"]
+
+    files = {}
+    changed = []
+    for relative_path, mtime, size in scan_files(doc_dir, ".md"):
+        entry = previous.get(relative_path)
+        if entry and entry[0] == mtime and entry[1] == size:
+            files[relative_path] = entry
+        else:
+            files[relative_path] = [mtime, size, None]
+            changed.append(relative_path)
+
+    if changed:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            titles = pool.map(_first_h1, [os.path.join(doc_dir, p) for p in changed])
+            for relative_path, title in zip(changed, titles):
+                files[relative_path][2] = title
+
+    output_file_path = Path(output_file_path)
+    unchanged = not changed and len(files) == len(previous)
+    if unchanged and output_file_path.exists():
+        st = output_file_path.stat()
+        if manifest["output"] == [str(output_file_path), st.st_mtime_ns, st.st_size]:
+            return
+
+    index_data = {path: entry[2] for path, entry in files.items() if entry[2] is not None}
     with output_file_path.open("w", encoding="utf-8") as f:
         json.dump(index_data, f, indent=4)
 
+    st = output_file_path.stat()
+    manifest = {"files": files, "output": [str(output_file_path), st.st_mtime_ns, st.st_size]}
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
 
 def A7(filename=BASE_DIR / "email.txt", output_file=BASE_DIR / "email-sender.txt"):
     with filename.open("r") as file:
@@ -129,7 +204,7 @@ def png_to_base64(image_path):
         return base64.b64encode(image_file.read()).decode("utf-8")
 
 
-def A8(filename=BASE_DIR / "credit_card.txt", image_path=BASE_DIR / "credit_card.png"):
+async def A8(filename=BASE_DIR / "credit_card.txt", image_path=BASE_DIR / "credit_card.png"):
     body = {
         "model": "gpt-4o-mini",
         "messages": [
@@ -143,50 +218,40 @@ def A8(filename=BASE_DIR / "credit_card.txt", image_path=BASE_DIR / "credit_card
         ],
     }
 
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {AIPROXY_TOKEN}"}
-
-    response = requests.post(
-        "http://aiproxy.sanand.workers.dev/openai/v1/chat/completions", headers=headers, data=json.dumps(body)
-    )
-
-    if response.status_code != 200:
-        print("Error in API request:", response.text)
+    try:
+        result = await aiproxy_post("chat/completions", body)
+    except Exception as e:
+        print("Error in API request:", e)
         return
 
-    result = response.json()
     card_number = result["choices"][0]["message"]["content"].replace(" ", "")
 
     with filename.open("w") as file:
         file.write(card_number)
 
 
-def get_embedding(text):
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {AIPROXY_TOKEN}"}
-    data = {"model": "text-embedding-3-small", "input": [text]}
+async def get_embedding(text):
+    return (await embed([text]))[0]
 
-    response = requests.post("http://aiproxy.sanand.workers.dev/openai/v1/embeddings", headers=headers, data=json.dumps(data))
-    response.raise_for_status()
-    return response.json()["data"][0]["embedding"]
 
-
-def A9(filename=BASE_DIR / "comments.txt", output_filename=BASE_DIR / "comments-similar.txt"):
+async def A9(
+    filename=BASE_DIR / "comments.txt",
+    output_filename=BASE_DIR / "comments-similar.txt",
+    top_k=1,
+    mode="auto",
+    tables=8,
+    bits=12,
+):
     with filename.open("r") as f:
         comments = [line.strip() for line in f.readlines()]
 
-    embeddings = [get_embedding(comment) for comment in comments]
-
-    min_distance = float("inf")
-    most_similar = (None, None)
-
-    for i in range(len(comments)):
-        for j in range(i + 1, len(comments)):
-            distance = cosine(embeddings[i], embeddings[j])
-            if distance < min_distance:
-                min_distance = distance
-                most_similar = (comments[i], comments[j])
+    embeddings = await embed(comments)
+    # The matrix work releases the GIL, so keep it off the event loop
+    pairs = await asyncio.to_thread(most_similar_pairs, embeddings, top_k, mode, tables=tables, bits=bits)
 
     with output_filename.open("w") as f:
-        f.write(most_similar[0] + "\n" + most_similar[1] + "\n")
+        f.write("\n".join(comments[i] + "\n" + comments[j] + "\n" for _, i, j in pairs))
+    return pairs
 
 
 def A10(
@@ -194,13 +259,8 @@ def A10(
     output_filename=BASE_DIR / "ticket-sales-gold.txt",
     query="SELECT SUM(units * price) FROM tickets WHERE type = 'Gold'",
 ):
-    conn = sqlite3.connect(filename)
-    cursor = conn.cursor()
-
-    cursor.execute(query)
-    total_sales = cursor.fetchone()[0] or 0
+    rows = cached_query(filename, query)
+    total_sales = (rows[0][0] if rows else None) or 0
 
     with output_filename.open("w") as file:
         file.write(str(total_sales))
-
-    conn.close()
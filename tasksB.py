@@ -12,13 +12,11 @@ def B12(filepath):
         return False
 
 # B3: Fetch Data from an API
-def B3(url, save_path):
+async def B3(url, save_path):
     if not B12(save_path):
         return None
-    import requests
-    response = requests.get(url)
-    with open(save_path, 'w') as file:
-        file.write(response.text)
+    from downloads import download
+    return await download(url, save_path)
 
 # B4: Clone a Git Repo and Make a Commit
 # def clone_git_repo(repo_url, commit_message):
@@ -27,37 +25,67 @@ def B3(url, save_path):
 #     subprocess.run(["git", "-C", "/data/repo", "commit", "-m", commit_message])
 
 # B5: Run SQL Query
-def B5(db_path, query, output_filename):
+def B5(db_path, query, output_filename, params=(), limit=None):
     if not B12(db_path):
         return None
-    import sqlite3, duckdb
-    conn = sqlite3.connect(db_path) if db_path.endswith('.db') else duckdb.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(query)
-    result = cur.fetchall()
-    conn.close()
-    with open(output_filename, 'w') as file:
-        file.write(str(result))
-    return result
+    from sql_export import export_query
+    if db_path.endswith('.db'):
+        from sqlite_pool import get_pool, is_read_only
+        if is_read_only(query):
+            with get_pool(db_path).connection() as conn:
+                return export_query(conn, query, output_filename, params, limit)
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        try:
+            result = export_query(conn, query, output_filename, params, limit)
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+    import duckdb
+    conn = duckdb.connect(db_path)
+    try:
+        return export_query(conn, query, output_filename, params, limit)
+    finally:
+        conn.close()
 
 # B6: Web Scraping
-def B6(url, output_filename):
-    import requests
-    result = requests.get(url).text
-    with open(output_filename, 'w') as file:
-        file.write(str(result))
+async def B6(url=None, output_filename=None, urls=None, url_file=None, concurrency=None, host_rate=None):
+    if urls is None and url_file is None:
+        if url is None:
+            raise ValueError("B6 needs url, urls or url_file")
+        from downloads import download
+        return await download(url, output_filename)
+    # Several URLs: output_filename is a directory that gets one file per URL
+    import json
+    import scraper
+    if url_file is not None and not B12(url_file):
+        return None
+    if not B12(output_filename):
+        return None
+    targets = ([url] if url else []) + list(urls or []) + (scraper.read_url_file(url_file) if url_file else [])
+    summary = await scraper.fetch_all(
+        targets,
+        output_filename,
+        concurrency=concurrency or scraper.SCRAPE_CONCURRENCY,
+        host_rate=host_rate or scraper.SCRAPE_HOST_RATE,
+    )
+    with open(os.path.join(output_filename, "summary.json"), 'w') as file:
+        json.dump(summary, file, indent=2)
+    return summary
 
 # B7: Image Processing
-def B7(image_path, output_path, resize=None):
-    from PIL import Image
+def B7(image_path, output_path, resize=None, mode="resize"):
+    import glob
+    import image_batch
     if not B12(image_path):
         return None
     if not B12(output_path):
         return None
-    img = Image.open(image_path)
-    if resize:
-        img = img.resize(resize)
-    img.save(output_path)
+    # A directory or glob processes every image in it into the output_path directory
+    if os.path.isdir(image_path) or glob.has_magic(image_path):
+        return image_batch.process_batch(image_path, output_path, resize, mode)
+    image_batch.process_image(image_path, output_path, resize, mode)
 
 # B8: Audio Transcription
 # def B8(audio_path):
@@ -69,15 +97,15 @@ def B7(image_path, output_path, resize=None):
 
 # B9: Markdown to HTML Conversion
 def B9(md_path, output_path):
-    import markdown
+    import markdown_site
     if not B12(md_path):
         return None
     if not B12(output_path):
         return None
-    with open(md_path, 'r') as file:
-        html = markdown.markdown(file.read())
-    with open(output_path, 'w') as file:
-        file.write(html)
+    # A directory converts its whole tree into the output_path directory
+    if os.path.isdir(md_path):
+        return markdown_site.build_site(md_path, output_path)
+    markdown_site.convert_file(md_path, output_path)
 
 # B10: API Endpoint for CSV Filtering
 # from flask import Flask, request, jsonify
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+import downloads
+
+BODY = bytes(range(256)) * 4096
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Send only this many bytes of the next full response, then drop the connection
+    cut_after = None
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(BODY):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(BODY)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        elif self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = BODY[start:]
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if Handler.cut_after is not None:
+            body, Handler.cut_after = body[:Handler.cut_after], None
+            self.wfile.write(body)
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(coroutine_function):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/file.bin"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = downloads.ValidatorCache(os.path.join(directory, "validators.db"))
+
+            async def main():
+                async with httpx.AsyncClient() as client:
+                    return await coroutine_function(url, os.path.join(directory, "file.bin"), client, cache)
+
+            return asyncio.run(main())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_download_then_not_modified():
+    async def check(url, path, client, cache):
+        first = await downloads.download(url, path, client=client, cache=cache)
+        second = await downloads.download(url, path, client=client, cache=cache)
+        with open(path, "rb") as f:
+            assert f.read() == BODY
+        assert (first["status"], second["status"]) == ("downloaded", "not_modified")
+
+    run(check)
+
+
+def test_interrupted_download_resumes():
+    async def check(url, path, client, cache):
+        Handler.cut_after = len(BODY) // 3
+        result = await downloads.download(url, path, client=client, cache=cache)
+        with open(path, "rb") as f:
+            assert f.read() == BODY
+        assert result["status"] == "resumed"
+        assert not os.path.exists(path + ".part")
+
+    run(check)
+
+
+def test_complete_part_file_is_finished_on_416():
+    async def check(url, path, client, cache):
+        with open(path + ".part", "wb") as f:
+            f.write(BODY)
+        cache.put(url, path, ETAG, None, complete=False)
+        result = await downloads.download(url, path, client=client, cache=cache)
+        with open(path, "rb") as f:
+            assert f.read() == BODY
+        assert result == {"status": "resumed", "bytes": len(BODY), "path": path}
+
+    run(check)
+
+
+def test_unusable_part_file_restarts_on_416():
+    async def check(url, path, client, cache):
+        with open(path + ".part", "wb") as f:
+            f.write(BODY + b"extra")
+        cache.put(url, path, ETAG, None, complete=False)
+        result = await downloads.download(url, path, client=client, cache=cache)
+        with open(path, "rb") as f:
+            assert f.read() == BODY
+        assert result["status"] == "downloaded"
+
+    run(check)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
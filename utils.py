@@ -0,0 +1,56 @@
+"""Small helpers shared by the task modules."""
+import hashlib
+import os
+
+# Set in task process-pool workers (and inherited by their children)
+WORKER_ENV = "TASK_POOL_WORKER"
+
+
+def file_hash(path):
+    """sha256 hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_files(root, suffix, skip=None):
+    """Yield (relative path, mtime_ns, size) for every file under root ending in suffix.
+
+    Relative paths use "/" and are built from a prefix stack rather than
+    os.path.relpath, which dominates the cost on large trees. Symlinked
+    directories are not followed and the directory ``skip`` is not entered.
+    """
+    pending = [(root, "")]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != skip:
+                        pending.append((entry.path, prefix + entry.name + "/"))
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    st = entry.stat()
+                    yield prefix + entry.name, st.st_mtime_ns, st.st_size
+
+
+def percentile(values, q):
+    """Nearest-rank q-th percentile of values, or None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def mark_worker():
+    os.environ[WORKER_ENV] = "1"
+
+
+def nested_workers(requested):
+    """How many processes code running inside a task may start.
+
+    CPU tasks already run in a pool of TASK_PROCESS_WORKERS processes, so their
+    own pools would multiply that; inside a worker they run in-process instead.
+    """
+    return 1 if os.environ.get(WORKER_ENV) == "1" else requested